@@ -1,117 +1,11 @@
 
 import argparse
-import math
 
-def parse_vrp(vrp_path):
-    with open(vrp_path, 'r') as file:
-        lines = file.readlines()
-
-    coords = {}
-    demands = {}
-    depot = None
-    dimension = 0
-    capacity = 0
-
-    node_section = False
-    demand_section = False
-    depot_section = False
-
-    for line in lines:
-        line = line.strip()
-        if line.startswith("DIMENSION"):
-            dimension = int(line.split(":")[1].strip())
-        elif line.startswith("CAPACITY"):
-            capacity = int(line.split(":")[1].strip())
-        elif line.startswith("NODE_COORD_SECTION"):
-            node_section = True
-            demand_section = depot_section = False
-            continue
-        elif line.startswith("DEMAND_SECTION"):
-            demand_section = True
-            node_section = depot_section = False
-            continue
-        elif line.startswith("DEPOT_SECTION"):
-            depot_section = True
-            node_section = demand_section = False
-            continue
-        elif line.startswith("EOF"):
-            break
-
-        if node_section:
-            parts = line.split()
-            if len(parts) >= 3:
-                idx = int(parts[0])
-                x = float(parts[1])
-                y = float(parts[2])
-                coords[idx] = (x, y)
-        elif demand_section:
-            parts = line.split()
-            if len(parts) >= 2:
-                idx = int(parts[0])
-                demand = int(parts[1])
-                demands[idx] = demand
-        elif depot_section:
-            if line == "-1":
-                depot_section = False
-            else:
-                depot = int(line)
-
-    if depot is None:
-        depot = 1  # Default depot
-
-    return {
-        "dimension": dimension,
-        "capacity": capacity,
-        "node_coords": coords,
-        "demands": demands,
-        "depot": depot
-    }
-
-def compute_distance_matrix(coords):
-    nodes = sorted(coords.keys())
-    dist_matrix = {}
-    for i in nodes:
-        dist_matrix[i] = {}
-        xi, yi = coords[i]
-        for j in nodes:
-            if i == j:
-                dist_matrix[i][j] = 0.0
-            else:
-                xj, yj = coords[j]
-                dist_matrix[i][j] = math.hypot(xi - xj, yi - yj)
-    return dist_matrix
-
-def nearest_neighbor_init(vrp_data):
-    coords = vrp_data["node_coords"]
-    demands = vrp_data["demands"]
-    capacity = vrp_data["capacity"]
-    depot = vrp_data["depot"]
-
-    visited = {node: False for node in coords}
-    visited[depot] = True
-
-    dist_matrix = compute_distance_matrix(coords)
-
-    routes = []
-    while not all(visited.values()):
-        route = [depot]
-        load = 0
-        current = depot
-
-        while True:
-            candidates = [node for node in coords if not visited[node] and load + demands.get(node, 0) <= capacity]
-            if not candidates:
-                break
-
-            next_node = min(candidates, key=lambda j: dist_matrix[current][j])
-            route.append(next_node)
-            visited[next_node] = True
-            load += demands.get(next_node, 0)
-            current = next_node
-
-        route.append(depot)
-        routes.append(route)
-    return routes
+from construction import nearest_neighbor_init, savings_init, sweep_init
+from inter_route import inter_route_search
+from local_search import add_local_search_arguments, local_search_options, two_opt_route
+from problem import add_distance_arguments, distance_options, parse_vrp
+from solution import Solution
 
 def route_cost(route, dist_matrix):
     cost = 0.0
@@ -120,35 +14,28 @@ def route_cost(route, dist_matrix):
     return cost
 
 def compute_total_cost(vrp_data, routes):
-    dist_matrix = compute_distance_matrix(vrp_data["node_coords"])
+    dist_matrix = vrp_data.dist_matrix
     total_cost = 0.0
     for route in routes:
         total_cost += route_cost(route, dist_matrix)
     return total_cost, dist_matrix
 
-def two_opt_route(route, dist_matrix):
-    best = route[:]
-    improved = True
-    while improved:
-        improved = False
-        for i in range(1, len(best) - 2):
-            for j in range(i + 1, len(best) -1):
-                if j - i == 1:
-                    continue
-                new_route = best[:i] + best[i:j][::-1] + best[j:]
-                if route_cost(new_route, dist_matrix) < route_cost(best, dist_matrix):
-                    best = new_route
-                    improved = True
-        route = best
-    return best
-
-def two_opt_vrp(vrp_data, routes, max_iterations=100):
-    dist_matrix = compute_distance_matrix(vrp_data["node_coords"])
+def two_opt_vrp(vrp_data, routes, max_iterations=100, dont_look=False, inter_route=False,
+                engine="python", workers=1):
+    dist_matrix = vrp_data.dist_matrix
     improved_routes = routes[:]
+    if inter_route:
+        improved_routes = inter_route_search(vrp_data, Solution(vrp_data, improved_routes)).routes
     for iteration in range(max_iterations):
         improvement_made = False
-        for idx, route in enumerate(improved_routes):
-            new_route = two_opt_route(route, dist_matrix)
+        if workers > 1:
+            new_routes = vrp_data.worker_pool(workers).two_opt_routes(improved_routes, dont_look,
+                                                                     engine=engine)
+        else:
+            new_routes = [two_opt_route(route, dist_matrix, vrp_data.candidates, dont_look,
+                                        engine=engine)
+                          for route in improved_routes]
+        for idx, new_route in enumerate(new_routes):
             if route_cost(new_route, dist_matrix) < route_cost(improved_routes[idx], dist_matrix):
                 improved_routes[idx] = new_route
                 improvement_made = True
@@ -171,10 +58,12 @@ def main():
     parser.add_argument('--par', type=str, help='Optional .par file with parameters')
     parser.add_argument('--save_tour', type=str, default='solution.tour', help='Path to save tour')
     parser.add_argument('--plot', type=str, default='routes.png', help='Path to save plot (ignored here)')
+    add_distance_arguments(parser)
+    add_local_search_arguments(parser)
     args = parser.parse_args()
 
     print(" Parsing .vrp file...")
-    vrp_data = parse_vrp(args.vrp)
+    vrp_data = parse_vrp(args.vrp, **distance_options(args))
 
     max_iter = 100
     init_strategy = "nearest"
@@ -196,6 +85,10 @@ def main():
     print(f" Generating initial solution using strategy: {init_strategy}")
     if init_strategy == "nearest":
         routes = nearest_neighbor_init(vrp_data)
+    elif init_strategy == "savings":
+        routes = savings_init(vrp_data)
+    elif init_strategy == "sweep":
+        routes = sweep_init(vrp_data, workers=args.workers, engine=args.engine)
     else:
         raise ValueError(f"Unknown INIT_STRATEGY: {init_strategy}")
 
@@ -203,7 +96,8 @@ def main():
     print(f"➡ Initial cost: {init_cost:.2f}")
 
     print(f" Running 2-opt for max {max_iter} iterations...")
-    improved_routes, final_cost = two_opt_vrp(vrp_data, routes, max_iterations=max_iter)
+    improved_routes, final_cost = two_opt_vrp(vrp_data, routes, max_iterations=max_iter,
+                                              **local_search_options(args))
     print(f" Final cost: {final_cost:.2f}")
 
     save_tour(improved_routes, args.save_tour, final_cost)
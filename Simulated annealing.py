@@ -1,209 +1,167 @@
 import argparse
 import math
-import random
-import copy
-
-# ----------- VRP Parsing Utilities -----------
-def parse_vrp(vrp_path):
-    with open(vrp_path, 'r') as file:
-        lines = file.readlines()
-
-    coords = {}
-    demands = {}
-    depot = None
-    dimension = 0
-    capacity = 0
-
-    node_section = demand_section = depot_section = False
-
-    for line in lines:
-        line = line.strip()
-        if line.startswith("DIMENSION"):
-            dimension = int(line.split(":")[1].strip())
-        elif line.startswith("CAPACITY"):
-            capacity = int(line.split(":")[1].strip())
-        elif line.startswith("NODE_COORD_SECTION"):
-            node_section, demand_section, depot_section = True, False, False
-            continue
-        elif line.startswith("DEMAND_SECTION"):
-            demand_section, node_section, depot_section = True, False, False
-            continue
-        elif line.startswith("DEPOT_SECTION"):
-            depot_section, node_section, demand_section = True, False, False
-            continue
-        elif line.startswith("EOF"):
-            break
 
-        if node_section:
-            idx, x, y = map(float, line.split())
-            coords[int(idx)] = (x, y)
-        elif demand_section:
-            idx, demand = map(int, line.split())
-            demands[idx] = demand
-        elif depot_section and line != "-1":
-            depot = int(line)
-
-    return {
-        "dimension": dimension,
-        "capacity": capacity,
-        "node_coords": coords,
-        "demands": demands,
-        "depot": depot or 1
-    }
-
-# ----------- Distance and Cost Utilities -----------
-def compute_distance(coords, a, b):
-    xa, ya = coords[a]
-    xb, yb = coords[b]
-    return math.hypot(xa - xb, ya - yb)
-
-def route_cost(route, coords):
-    return sum(compute_distance(coords, route[i], route[i+1]) for i in range(len(route)-1))
-
-def compute_total_cost(vrp_data, routes):
-    coords = vrp_data["node_coords"]
-    return sum(route_cost(r, coords) for r in routes)
-
-# ----------- Initial Solution (Nearest Neighbor) -----------
-def nearest_neighbor_init(vrp_data):
-    coords, demands = vrp_data["node_coords"], vrp_data["demands"]
-    capacity, depot = vrp_data["capacity"], vrp_data["depot"]
-
-    visited = {node: False for node in coords}
-    visited[depot] = True
-
-    dist = lambda a, b: compute_distance(coords, a, b)
-
-    routes = []
-    while not all(visited.values()):
-        route, load, current = [depot], 0, depot
-        while True:
-            candidates = [node for node in coords if not visited[node] and load + demands.get(node, 0) <= capacity]
-            if not candidates:
-                break
-            next_node = min(candidates, key=lambda j: dist(current, j))
-            route.append(next_node)
-            visited[next_node] = True
-            load += demands.get(next_node, 0)
-            current = next_node
-        route.append(depot)
-        routes.append(route)
-    return routes
-
-# ----------- Local Search (2-Opt) -----------
-def two_opt_route(route, coords):
-    best = route[:]
-    improved = True
-    while improved:
-        improved = False
-        for i in range(1, len(best)-2):
-            for j in range(i+1, len(best)-1):
-                if j - i == 1:
-                    continue
-                new = best[:i] + best[i:j][::-1] + best[j:]
-                if route_cost(new, coords) < route_cost(best, coords):
-                    best = new
-                    improved = True
-    return best
-
-def two_opt_vrp(vrp_data, routes):
-    coords = vrp_data["node_coords"]
-    return [two_opt_route(r, coords) for r in routes]
-
-# ----------- Perturbation (Shaking) -----------
-def find_nearby_pairs(route, coords, radius=10):
-    pairs = []
-    nodes = route[1:-1]
-    for i in range(len(nodes)):
-        for j in range(i+1, len(nodes)):
-            if compute_distance(coords, nodes[i], nodes[j]) <= radius:
-                pairs.append((nodes[i], nodes[j]))
-    return pairs
-
-def random_exchange(routes, coords, m, radius=10):
-    all_routes = copy.deepcopy(routes)
-    n = len(all_routes)
-    if n < 2:
-        return all_routes
-
-    exchanges_done = 0
-    attempts = 0
-    max_attempts = m * 10
-
-    while exchanges_done < m and attempts < max_attempts:
-        attempts += 1
-        r1_idx, r2_idx = random.sample(range(n), 2)
-        r1, r2 = all_routes[r1_idx], all_routes[r2_idx]
-
-        pairs_r1 = find_nearby_pairs(r1, coords, radius)
-        pairs_r2 = find_nearby_pairs(r2, coords, radius)
-
-        if not pairs_r1 or not pairs_r2:
-            continue
-
-        p1 = random.choice(pairs_r1)
-        p2 = random.choice(pairs_r2)
-
-        def swap(route, old, new):
-            route = [x for x in route if x not in old]
-            return [route[0]] + list(new) + route[1:]
-
-        all_routes[r1_idx] = swap(r1, p1, p2)
-        all_routes[r2_idx] = swap(r2, p2, p1)
-        exchanges_done += 1
-
-    return all_routes
+from anytime import TimeBudget, add_time_limit_arguments, make_checkpoint
+from construction import nearest_neighbor_init
+from local_search import add_local_search_arguments, local_search_options, local_search_vrp
+from parallel import worker_problem
+from problem import add_distance_arguments, distance_options, parse_vrp
+from seeding import add_seed_argument, make_rng, substreams
+from shaking import random_exchange
+from solution import Solution
 
 # ----------- Simulated Annealing -----------
-def simulated_annealing(vrp_data, initial_temp=100, cooling_rate=0.95, min_temp=0.01, max_iter=100, radius=10):
-    coords = vrp_data["node_coords"]
-    
+def anneal_step(vrp_data, current, temperature, radius, ls_options, rng):
+    """One move of the chain: shake, local search, then accept the neighbour
+    if better or with probability e^(-delta/T). Returns the new current."""
+    neighbor = random_exchange(current, m=1, radius=radius,
+                               neighbors=vrp_data.shaking_neighbors(radius), rng=rng)
+    neighbor = local_search_vrp(vrp_data, neighbor, **ls_options)
+    delta = neighbor.total_cost - current.total_cost
+    if delta < 0 or rng.random() < math.exp(-delta / temperature):
+        return neighbor
+    return current
+
+
+def simulated_annealing(vrp_data, initial_temp=100, cooling_rate=0.95, min_temp=0.01, max_iter=100, radius=10,
+                        ls_options=None, rng=None, time_limit=None, checkpoint=None):
+    """With `time_limit` (seconds) the run stops on the clock instead of
+    max_iter, and the temperature follows the time used rather than
+    cooling_rate. `checkpoint(routes, cost)` is called on each new best and
+    polled every iteration."""
+    ls_options = ls_options or {}
+    rng = rng or make_rng()
+    budget = TimeBudget(time_limit) if time_limit else None
+
     # Step 1: Initial solution
-    current_routes = nearest_neighbor_init(vrp_data)
-    current_cost = compute_total_cost(vrp_data, current_routes)
-    best_routes = copy.deepcopy(current_routes)
+    current = Solution(vrp_data, nearest_neighbor_init(vrp_data))
+    current_cost = current.total_cost
+    best = current
     best_cost = current_cost
     
     temperature = initial_temp
     iteration = 0
     
     print(f"Initial solution cost: {current_cost:.2f}")
+    if checkpoint:
+        checkpoint(best.routes, best_cost)
     
     # Main SA loop
-    while temperature > min_temp and iteration < max_iter:
+    while not budget.expired() if budget else (temperature > min_temp and iteration < max_iter):
         iteration += 1
+        if budget:
+            temperature = budget.temperature(initial_temp, min_temp)
         
-        # Step 2: Generate neighbor solution
-        neighbor_routes = random_exchange(current_routes, coords, m=1, radius=radius)
-        
-        # Step 3: Local Search (optional in pure SA, but can improve results)
-        neighbor_routes = two_opt_vrp(vrp_data, neighbor_routes)
-        neighbor_cost = compute_total_cost(vrp_data, neighbor_routes)
-        
-        # Step 4: Decide whether to accept the new solution
-        delta = neighbor_cost - current_cost
-        
-        # Accept if better, or with probability e^(-delta/T) if worse
-        if delta < 0 or random.random() < math.exp(-delta / temperature):
-            current_routes = copy.deepcopy(neighbor_routes)
-            current_cost = neighbor_cost
+        # Steps 2-4: shake, local search, accept or reject
+        neighbor = anneal_step(vrp_data, current, temperature, radius, ls_options, rng)
+        if neighbor is not current:
+            current = neighbor
+            current_cost = neighbor.total_cost
             
             # Update best solution if needed
             if current_cost < best_cost:
-                best_routes = copy.deepcopy(current_routes)
+                best = current
                 best_cost = current_cost
                 print(f"Iteration {iteration}: New best cost = {best_cost:.2f}, T = {temperature:.2f}")
+                if checkpoint:
+                    checkpoint(best.routes, best_cost)
         
         # Step 5: Cool down temperature
-        temperature *= cooling_rate
+        if budget is None:
+            temperature *= cooling_rate
         
         # Optional: Print progress every few iterations
         if iteration % 10 == 0:
             print(f"Iteration {iteration}: Current cost = {current_cost:.2f}, Best = {best_cost:.2f}, T = {temperature:.2f}")
+        if checkpoint:
+            checkpoint.poll()
     
+    if checkpoint:
+        checkpoint.flush()
     print(f"SA completed after {iteration} iterations")
     print(f"Final temperature: {temperature:.6f}")
-    return best_routes, best_cost
+    return best.routes, best_cost
+
+# ----------- Multi-Start Parallel Simulated Annealing -----------
+def _anneal_chain(task):
+    # Runs one chain for up to `steps` iterations inside a pool worker and
+    # hands its state back, random stream and local-search flags included.
+    state, temperature, iteration, steps, rng, time_left, params = task
+    vrp_data = worker_problem()
+    budget = TimeBudget(params["time_limit"], time_left) if params["time_limit"] else None
+    current = best = Solution.from_state(vrp_data, state)
+    for _ in range(steps):
+        if budget:
+            if budget.expired():
+                break
+            temperature = budget.temperature(params["initial_temp"], params["min_temp"])
+        elif temperature <= params["min_temp"] or iteration >= params["max_iter"]:
+            break
+        iteration += 1
+        current = anneal_step(vrp_data, current, temperature, params["radius"], params["ls_options"], rng)
+        if current.total_cost < best.total_cost:
+            best = current
+        if budget is None:
+            temperature *= params["cooling_rate"]
+    return current.state(), current.total_cost, best.state(), best.total_cost, temperature, iteration, rng
+
+def parallel_simulated_annealing(vrp_data, chains=4, exchange_every=10, initial_temp=100, cooling_rate=0.95,
+                                 min_temp=0.01, max_iter=100, radius=10, ls_options=None, rng=None,
+                                 time_limit=None, checkpoint=None):
+    """Runs `chains` SA chains side by side in worker processes, each with
+    its own substream of `rng`, from the nearest neighbour solution.
+
+    Every `exchange_every` iterations the global best is broadcast and the
+    chains currently worse than it continue from it. Returns the global best.
+    `time_limit` and `checkpoint` work as in simulated_annealing.
+    """
+    ls_options = dict(ls_options or {}, workers=1)
+    rng = rng or make_rng()
+    budget = TimeBudget(time_limit) if time_limit else None
+    params = {"initial_temp": initial_temp, "min_temp": min_temp, "max_iter": max_iter, "radius": radius,
+              "cooling_rate": cooling_rate, "ls_options": ls_options, "time_limit": time_limit}
+
+    # Chains exchange Solution states, so the flags marking routes local
+    # search has converged on survive from one round to the next.
+    initial = Solution(vrp_data, nearest_neighbor_init(vrp_data))
+    best_state, best_cost = initial.state(), initial.total_cost
+    print(f"Initial solution cost: {best_cost:.2f}")
+    if checkpoint:
+        checkpoint(best_state[0], best_cost)
+
+    currents = [(best_state, best_cost)] * chains
+    temperatures = [initial_temp] * chains
+    iterations = [0] * chains
+    streams = substreams(rng, chains)
+    pool = vrp_data.worker_pool(chains)
+
+    while (not budget.expired() if budget else
+           any(t > min_temp and it < max_iter for t, it in zip(temperatures, iterations))):
+        time_left = budget.remaining() if budget else None
+        tasks = [(currents[c][0], temperatures[c], iterations[c], exchange_every, streams[c], time_left, params)
+                 for c in range(chains)]
+        for c, result in enumerate(pool.map(_anneal_chain, tasks)):
+            state, cost, chain_best, chain_best_cost, temperatures[c], iterations[c], streams[c] = result
+            currents[c] = (state, cost)
+            if chain_best_cost < best_cost:
+                best_state, best_cost = chain_best, chain_best_cost
+                print(f"Iteration {iterations[c]}: New best cost = {best_cost:.2f} (chain {c})")
+                if checkpoint:
+                    checkpoint(best_state[0], best_cost)
+
+        # Exchange: chains behind the incumbent carry on from it.
+        currents = [(best_state, best_cost) if cost > best_cost else (state, cost)
+                    for state, cost in currents]
+        print(f"Iteration {max(iterations)}: Best = {best_cost:.2f}, "
+              f"T = {max(temperatures):.2f}, chains = {chains}")
+        if checkpoint:
+            checkpoint.poll()
+
+    if checkpoint:
+        checkpoint.flush()
+
+    print(f"Parallel SA completed after {max(iterations)} iterations per chain")
+    return best_state[0], best_cost
 
 # ----------- Save Tour -----------
 def save_tour(routes, path, total_cost):
@@ -222,20 +180,35 @@ def main():
     parser.add_argument('--min_temp', type=float, default=0.01, help='Minimum temperature')
     parser.add_argument('--max_iter', type=int, default=100, help='Maximum iterations')
     parser.add_argument('--radius', type=float, default=10, help='Radius for pairwise perturbation')
+    parser.add_argument('--chains', type=int, default=1, help='Independent SA chains run in parallel processes')
+    parser.add_argument('--exchange_every', type=int, default=10,
+                        help='Iterations between broadcasts of the best solution across chains')
+    add_distance_arguments(parser)
+    add_local_search_arguments(parser)
+    add_seed_argument(parser)
+    add_time_limit_arguments(parser)
     args = parser.parse_args()
 
     print(" Loading VRP...")
-    vrp_data = parse_vrp(args.vrp)
+    vrp_data = parse_vrp(args.vrp, **distance_options(args))
 
     print(" Starting Simulated Annealing...")
-    best_routes, best_cost = simulated_annealing(
-        vrp_data, 
+    options = dict(
         initial_temp=args.initial_temp,
         cooling_rate=args.cooling_rate,
         min_temp=args.min_temp,
         max_iter=args.max_iter,
-        radius=args.radius
+        radius=args.radius,
+        ls_options=local_search_options(args),
+        rng=make_rng(args.seed),
+        time_limit=args.time_limit,
+        checkpoint=make_checkpoint(args, save_tour, args.save_tour)
     )
+    if args.chains > 1:
+        best_routes, best_cost = parallel_simulated_annealing(
+            vrp_data, chains=args.chains, exchange_every=args.exchange_every, **options)
+    else:
+        best_routes, best_cost = simulated_annealing(vrp_data, **options)
 
     print(f" Final cost: {best_cost:.2f}")
     save_tour(best_routes, args.save_tour, best_cost)
@@ -0,0 +1,81 @@
+import os
+import time
+
+
+# ----------- Wall-Clock Budget -----------
+class TimeBudget:
+    """A wall-clock limit in seconds; checking it costs one clock read.
+
+    ``remaining`` restarts a budget part-way through, e.g. in a worker
+    process that was handed what was left of it.
+    """
+
+    def __init__(self, limit, remaining=None):
+        self.limit = limit
+        self.deadline = time.monotonic() + (limit if remaining is None else remaining)
+
+    def remaining(self):
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def expired(self):
+        return time.monotonic() >= self.deadline
+
+    def fraction_used(self):
+        return min(1.0 - self.remaining() / self.limit, 1.0) if self.limit > 0 else 1.0
+
+    def temperature(self, initial_temp, min_temp):
+        """Geometric cooling spread over the budget: initial_temp at the
+        start, min_temp at the deadline, whatever the iteration rate."""
+        return initial_temp * (min_temp / initial_temp) ** self.fraction_used()
+
+
+# ----------- Incumbent Checkpoints -----------
+class Checkpoint:
+    """Saves the incumbent to the output tour while a run is going.
+
+    Calls are cheap: the first incumbent is written at once, later ones at
+    most once per ``interval`` seconds. Solvers ``poll`` every iteration so
+    a pending incumbent reaches the disk on the clock, not only when the
+    next one arrives, and ``flush`` when they stop. Each write goes to a
+    temporary file first, so the tour on disk is always complete.
+    """
+
+    def __init__(self, save, path, interval=5.0):
+        self.save = save
+        self.path = path
+        self.interval = interval
+        self.pending = None
+        self.last_write = float("-inf")
+
+    def __call__(self, routes, cost):
+        self.pending = (routes, cost)
+        self.poll()
+
+    def poll(self):
+        if self.pending is not None and time.monotonic() - self.last_write >= self.interval:
+            self.flush()
+
+    def flush(self):
+        if self.pending is None:
+            return
+        routes, cost = self.pending
+        tmp_path = f"{self.path}.tmp"
+        self.save(routes, tmp_path, cost)
+        os.replace(tmp_path, self.path)
+        self.pending = None
+        self.last_write = time.monotonic()
+
+
+# ----------- Command Line Options -----------
+def add_time_limit_arguments(parser):
+    parser.add_argument('--time_limit', type=float, default=None,
+                        help='Wall-clock budget in seconds; replaces the iteration limit and returns the best found')
+    parser.add_argument('--checkpoint_every', type=float, default=5.0,
+                        help='Seconds between saves of the incumbent to the output tour in --time_limit mode')
+
+
+def make_checkpoint(args, save, path):
+    """The Checkpoint for a --time_limit run, None otherwise."""
+    if args.time_limit is None:
+        return None
+    return Checkpoint(save, path, args.checkpoint_every)
@@ -0,0 +1,82 @@
+import argparse
+import json
+import math
+import os
+import random
+
+# Customers per bundled instance and the vehicle capacity used for each
+# (demands are 1..30, so routes hold roughly capacity / 15 customers).
+SIZES = {100: 200, 1000: 400, 10000: 1000}
+SIDE = 1000
+INSTANCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "instances")
+
+
+# ----------- Instance Generation -----------
+def generate_instance(customers, capacity, seed):
+    """Uniform random customers around a central depot (node 1)."""
+    rng = random.Random(seed)
+    coords = {1: (SIDE // 2, SIDE // 2)}
+    demands = {1: 0}
+    for node in range(2, customers + 2):
+        coords[node] = (rng.randint(0, SIDE), rng.randint(0, SIDE))
+        demands[node] = rng.randint(1, 30)
+    return coords, demands
+
+
+def write_vrp(path, name, coords, demands, capacity):
+    with open(path, 'w') as f:
+        f.write(f"NAME : {name}\n")
+        f.write("TYPE : CVRP\n")
+        f.write(f"DIMENSION : {len(coords)}\n")
+        f.write("EDGE_WEIGHT_TYPE : EUC_2D\n")
+        f.write(f"CAPACITY : {capacity}\n")
+        f.write("NODE_COORD_SECTION\n")
+        for node, (x, y) in coords.items():
+            f.write(f"{node} {x} {y}\n")
+        f.write("DEMAND_SECTION\n")
+        for node, demand in demands.items():
+            f.write(f"{node} {demand}\n")
+        f.write("DEPOT_SECTION\n1\n-1\nEOF\n")
+
+
+# ----------- Lower Bound -----------
+def lower_bound(coords, demands, capacity, depot=1):
+    """Radial bound: every unit of demand travels to and from the depot in a
+    vehicle of the given capacity, and the farthest customer must be
+    visited, so the cost is at least max(2 * sum(q_i * d_0i) / Q, 2 * max d_0i)."""
+    dx, dy = coords[depot]
+    radial = {node: math.hypot(x - dx, y - dy) for node, (x, y) in coords.items() if node != depot}
+    return max(2 * sum(demands[node] * d for node, d in radial.items()) / capacity,
+               2 * max(radial.values()))
+
+
+# ----------- Main -----------
+def main():
+    parser = argparse.ArgumentParser(description="Generate the bundled benchmark instances")
+    parser.add_argument('--out_dir', type=str, default=INSTANCE_DIR, help='Directory for the .vrp files and manifest')
+    parser.add_argument('--seed', type=int, default=2024, help='Base seed; instance i uses seed + i')
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    manifest = []
+    for i, (customers, capacity) in enumerate(SIZES.items()):
+        name = f"bench{customers}"
+        coords, demands = generate_instance(customers, capacity, args.seed + i)
+        write_vrp(os.path.join(args.out_dir, f"{name}.vrp"), name, coords, demands, capacity)
+        manifest.append({
+            "name": name,
+            "file": f"{name}.vrp",
+            "customers": customers,
+            "capacity": capacity,
+            "lower_bound": round(lower_bound(coords, demands, capacity), 2),
+            "best_known": None,
+        })
+        print(f" Wrote {name}.vrp")
+
+    with open(os.path.join(args.out_dir, "instances.json"), 'w') as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    print(f" Manifest saved to {os.path.join(args.out_dir, 'instances.json')}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+import argparse
+import json
+import math
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+
+from problem import parse_vrp  # noqa: E402
+
+# Entry points in run order: reduced VNS starts from the 2-opt tour.
+# "iterations" is a regex over the solver's output, or the fixed count it
+# runs; None for the single-pass constructors.
+SOLVERS = {
+    "2_opt": {"script": "2_opt.py", "args": ["--save_tour", "{tour}"], "iterations": None},
+    "greedy": {"script": "greedy.py", "args": ["--save_tour", "{tour}"], "iterations": None},
+    "simulated_annealing": {
+        "script": "Simulated annealing.py",
+        "args": ["--save_tour", "{tour}", "--radius", "{radius}", "--seed", "{seed}"],
+        "iterations": r"completed after (\d+) iterations",
+    },
+    "basic_vns": {
+        "script": "basic_VNS.py",
+        "args": ["--save_tour", "{tour}", "--radius", "{radius}", "--seed", "{seed}", "--max_iter", "50"],
+        "iterations": 50,
+    },
+    "skewed_vns": {
+        "script": "skewed_vns.py",
+        "args": ["--save_tour", "{tour}", "--radius", "{radius}", "--seed", "{seed}", "--max_iter", "50"],
+        "iterations": 50,
+    },
+    "reduced_vns": {
+        "script": "reduced_VNS.py",
+        "args": ["--tour", "{start_tour}", "--output", "{tour}", "--radius", "{radius}", "--seed", "{seed}"],
+        "iterations": 100,
+    },
+}
+
+# Above this many customers the solvers compute distances on demand rather
+# than holding the full matrix.
+LARGE_INSTANCE = 5000
+
+
+# ----------- Running One Solver -----------
+def run_command(cmd, log_path, timeout):
+    """Runs cmd from the repository root. Returns (exit code or None on
+    timeout, wall seconds, peak resident memory in MB)."""
+    with open(log_path, 'w') as log:
+        start = time.perf_counter()
+        proc = subprocess.Popen(cmd, cwd=ROOT, stdout=log, stderr=subprocess.STDOUT)
+        timer = threading.Timer(timeout, proc.kill)
+        timer.start()
+        _, status, usage = os.wait4(proc.pid, 0)
+        wall = time.perf_counter() - start
+        timed_out = not timer.is_alive()
+        timer.cancel()
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    peak = usage.ru_maxrss / (2 ** 20 if sys.platform == "darwin" else 2 ** 10)
+    return (None if timed_out else proc.returncode), wall, peak
+
+
+def read_routes(tour_path):
+    routes = []
+    with open(tour_path, 'r') as f:
+        for line in f:
+            if line.startswith("Route"):
+                routes.append([int(node) for node in line.split(":")[1].split()])
+    return routes
+
+
+def score_tour(vrp_data, tour_path):
+    """Recomputes the cost of a saved tour and checks it visits every
+    customer once without exceeding the capacity."""
+    depot, demands = vrp_data["depot"], vrp_data.demand_list
+    routes = read_routes(tour_path)
+    visited = sorted(node for route in routes for node in route)
+    customers = sorted(vrp_data.customers.tolist())
+    feasible = visited == customers and all(
+        sum(demands[node] for node in route) <= vrp_data["capacity"] for route in routes)
+    cost = sum(vrp_data.dist_matrix.route_cost([depot] + route + [depot]) for route in routes)
+    return cost, len(routes), feasible
+
+
+def count_iterations(spec, log_path):
+    if spec is None or isinstance(spec, int):
+        return spec
+    with open(log_path, 'r') as f:
+        found = re.findall(spec, f.read())
+    return int(found[-1]) if found else None
+
+
+def run_solver(name, instance, vrp_data, params, work_dir, timeout):
+    solver = SOLVERS[name]
+    tour = os.path.join(work_dir, f"{instance['name']}.{name}.tour")
+    log_path = os.path.join(work_dir, f"{instance['name']}.{name}.log")
+    args = [arg.format(tour=tour, **params) for arg in solver["args"]]
+    cmd = [sys.executable, solver["script"], "--vrp", params["vrp"]] + args + params["distance_args"]
+    code, wall, peak = run_command(cmd, log_path, timeout)
+
+    record = {
+        "solver": name,
+        "instance": instance["name"],
+        "customers": instance["customers"],
+        "status": "timeout" if code is None else ("ok" if code == 0 else "error"),
+        "wall_time_s": round(wall, 3),
+        "peak_memory_mb": round(peak, 1),
+        "iterations": None,
+        "iterations_per_s": None,
+        "cost": None,
+        "routes": None,
+        "feasible": None,
+        "lower_bound": instance.get("lower_bound"),
+        "best_known": instance.get("best_known"),
+        "gap": None,
+    }
+    if record["status"] != "ok":
+        return record, None
+
+    iterations = count_iterations(solver["iterations"], log_path)
+    cost, n_routes, feasible = score_tour(vrp_data, tour)
+    reference = instance.get("best_known") or instance.get("lower_bound")
+    record.update({
+        "iterations": iterations,
+        "iterations_per_s": round(iterations / wall, 2) if iterations else None,
+        "cost": round(cost, 2),
+        "routes": n_routes,
+        "feasible": feasible,
+        "gap": round(cost / reference - 1, 4) if reference else None,
+    })
+    return record, tour
+
+
+# ----------- Suite -----------
+def solver_params(instance, vrp_path, vrp_data, seed):
+    # Shaking radius: about two typical customer spacings.
+    xy = vrp_data.xy[vrp_data.nodes]
+    span = xy.max(axis=0) - xy.min(axis=0)
+    radius = 2 * math.sqrt(max(span[0], 1.0) * max(span[1], 1.0) / instance["customers"])
+    large = instance["customers"] > LARGE_INSTANCE
+    return {
+        "vrp": vrp_path,
+        "radius": f"{radius:.1f}",
+        "seed": str(seed),
+        "start_tour": None,
+        "distance_args": ["--distance", "lazy"] if large else [],
+    }
+
+
+def run_suite(manifest_path, solvers, names, seed, timeout, work_dir):
+    with open(manifest_path, 'r') as f:
+        instances = json.load(f)
+    instance_dir = os.path.dirname(os.path.abspath(manifest_path))
+
+    results = []
+    for instance in instances:
+        if names and instance["name"] not in names:
+            continue
+        vrp_path = os.path.join(instance_dir, instance["file"])
+        vrp_data = parse_vrp(vrp_path, distance="lazy")
+        params = solver_params(instance, vrp_path, vrp_data, seed)
+
+        for name in SOLVERS:
+            if name not in solvers and not (name == "2_opt" and "reduced_vns" in solvers):
+                continue
+            if name == "reduced_vns" and params["start_tour"] is None:
+                print(f" Skipping reduced_vns on {instance['name']}: no 2-opt start tour")
+                continue
+            print(f" Running {name} on {instance['name']}...")
+            record, tour = run_solver(name, instance, vrp_data, params, work_dir, timeout)
+            if name == "2_opt":
+                params["start_tour"] = tour
+                if name not in solvers:
+                    continue
+            print(f"   {record['status']}: {record['wall_time_s']:.2f}s, cost = {record['cost']}")
+            results.append(record)
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+# ----------- Main -----------
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every solver entry point on the bundled instances")
+    parser.add_argument('--instances', type=str, default=os.path.join(BENCH_DIR, "instances", "instances.json"),
+                        help='Instance manifest (see generate_instances.py)')
+    parser.add_argument('--solvers', nargs='+', choices=list(SOLVERS), default=list(SOLVERS),
+                        help='Entry points to run')
+    parser.add_argument('--only', nargs='+', default=None, help='Instance names to run (default: all)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed passed to the randomized solvers')
+    parser.add_argument('--timeout', type=float, default=3600, help='Seconds before a run is killed')
+    parser.add_argument('--work_dir', type=str, default=None, help='Keep tours and logs here (default: temporary)')
+    parser.add_argument('--output', type=str, default='benchmark_report.json', help='JSON report path')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = args.work_dir or tmp
+        os.makedirs(work_dir, exist_ok=True)
+        results = run_suite(args.instances, args.solvers, args.only, args.seed, args.timeout, work_dir)
+
+    report = dict(environment(), seed=args.seed, results=results)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f" Report saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
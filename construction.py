@@ -0,0 +1,173 @@
+import heapq
+
+import numpy as np
+
+from local_search import two_opt_route
+from spatial import DemandKDTree
+
+# Nearest customers each customer is considered for merging with in the
+# savings construction.
+SAVINGS_K = 20
+
+
+# ----------- Nearest Neighbour -----------
+def nearest_neighbor_init(vrp_data):
+    """Routes built by always driving to the nearest unvisited customer that
+    still fits, starting a new route when none does. Ties go to the customer
+    listed first in the instance.
+
+    Customers sit in a DemandKDTree, so each step is a tree query rather than
+    a scan of every node: O(n log n) overall instead of O(n^2).
+    """
+    capacity, depot = vrp_data["capacity"], vrp_data["depot"]
+    customers = vrp_data.customers.tolist()
+    if not customers:
+        return []
+
+    xy, demands = vrp_data.xy, vrp_data.demand_array
+    rank = np.zeros(len(xy), dtype=np.int64)
+    rank[customers] = np.arange(len(customers))
+    tree = DemandKDTree(xy, customers, demands[customers])
+    distances_from = vrp_data.dist_matrix.distances_from
+
+    routes = []
+    remaining = len(customers)
+    while remaining:
+        route, load, current = [depot], 0, depot
+        while True:
+            next_node = tree.nearest(xy[current], capacity - load,
+                                     lambda nodes: distances_from(current, nodes), rank)
+            if next_node is None:
+                break
+            tree.remove(next_node)
+            route.append(next_node)
+            load += int(demands[next_node])
+            current = next_node
+            remaining -= 1
+        if len(route) == 1:
+            raise ValueError("A customer's demand exceeds the vehicle capacity")
+        route.append(depot)
+        routes.append(route)
+    return routes
+
+
+# ----------- Clarke-Wright Savings -----------
+def _find(parent, node):
+    while parent[node] != node:
+        parent[node] = parent[parent[node]]
+        node = parent[node]
+    return node
+
+
+def savings_init(vrp_data, k=SAVINGS_K):
+    """Parallel Clarke-Wright savings: every customer starts on its own
+    route, then the ends of two routes are joined in decreasing order of the
+    saving d(0, i) + d(0, j) - d(i, j), while the load fits.
+
+    Only pairs among each customer's k nearest customers are scored, and
+    they are drawn from a heap, so the construction is O(n k log n).
+    Routes are held as links between customers with a union-find over the
+    route each belongs to, so a merge never copies a route.
+    """
+    capacity, depot = vrp_data["capacity"], vrp_data["depot"]
+    customers = vrp_data.customers.tolist()
+    if not customers:
+        return []
+
+    demands = vrp_data.demand_array
+    if demands[customers].max() > capacity:
+        raise ValueError("A customer's demand exceeds the vehicle capacity")
+    dist = vrp_data.dist_matrix
+    neighbors = vrp_data.nearest_customers(k)
+    depot_dist = np.zeros(len(vrp_data.xy))
+    depot_dist[customers] = dist.distances_from(depot, customers)
+
+    # A pair found from both ends is pushed twice; the second pop is skipped
+    # as its two customers already share a route.
+    heap = []
+    for i in customers:
+        others = neighbors[i]
+        if not others:
+            continue
+        saving = depot_dist[i] + depot_dist[others] - dist.distances_from(i, others)
+        heap.extend((-s, min(i, j), max(i, j)) for s, j in zip(saving.tolist(), others) if s > 0)
+    heapq.heapify(heap)
+
+    parent = list(range(len(vrp_data.xy)))
+    load = demands.tolist()
+    links = {node: [] for node in customers}
+    while heap:
+        _, i, j = heapq.heappop(heap)
+        # Both must still be route ends, on different routes that fit together.
+        if len(links[i]) == 2 or len(links[j]) == 2:
+            continue
+        root_i, root_j = _find(parent, i), _find(parent, j)
+        if root_i == root_j or load[root_i] + load[root_j] > capacity:
+            continue
+        links[i].append(j)
+        links[j].append(i)
+        parent[root_j] = root_i
+        load[root_i] += load[root_j]
+
+    # Walk each chain of links from its first end met in instance order.
+    routes = []
+    placed = set()
+    for start in customers:
+        if start in placed or len(links[start]) == 2:
+            continue
+        route, previous, node = [depot], None, start
+        while node is not None:
+            route.append(node)
+            placed.add(node)
+            following = [other for other in links[node] if other != previous]
+            previous, node = node, (following[0] if following else None)
+        route.append(depot)
+        routes.append(route)
+    return routes
+
+
+# ----------- Sweep -----------
+def sweep_sectors(vrp_data):
+    """Customers taken in polar-angle order around the depot and cut into
+    consecutive sectors that each fill one vehicle, one route per sector in
+    angle order.
+
+    The sweep starts just after the widest empty angle around the depot, so
+    no sector straddles a gap between clusters.
+    """
+    capacity, depot = vrp_data["capacity"], vrp_data["depot"]
+    customers = vrp_data.customers
+    if not len(customers):
+        return []
+
+    offset = vrp_data.xy[customers] - vrp_data.xy[depot]
+    angle = np.arctan2(offset[:, 1], offset[:, 0])
+    order = np.argsort(angle, kind="stable")
+    gaps = np.diff(np.r_[angle[order], angle[order[0]] + 2 * np.pi])
+    order = np.roll(order, -(int(np.argmax(gaps)) + 1))
+
+    routes = []
+    route, load = [depot], 0
+    nodes = customers[order]
+    for node, demand in zip(nodes.tolist(), vrp_data.demand_array[nodes].tolist()):
+        if demand > capacity:
+            raise ValueError("A customer's demand exceeds the vehicle capacity")
+        if load + demand > capacity:
+            route.append(depot)
+            routes.append(route)
+            route, load = [depot], 0
+        route.append(node)
+        load += demand
+    route.append(depot)
+    routes.append(route)
+    return routes
+
+
+def sweep_init(vrp_data, workers=1, engine="python"):
+    """Sweep: the routes of sweep_sectors, each improved by 2-opt (in
+    ``workers`` pool processes when more than one)."""
+    routes = sweep_sectors(vrp_data)
+    if workers > 1 and len(routes) > 1:
+        return vrp_data.worker_pool(workers).two_opt_routes(routes, engine=engine)
+    return [two_opt_route(route, vrp_data.dist_matrix, vrp_data.candidates, engine=engine)
+            for route in routes]
@@ -0,0 +1,199 @@
+import argparse
+import importlib
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from construction import sweep_sectors
+from local_search import add_local_search_arguments, local_search_options, local_search_vrp
+from problem import VRPProblem, add_distance_arguments, distance_options, parse_vrp
+from seeding import add_seed_argument, make_rng, substreams
+from solution import Solution
+
+# Solver run on each cluster: (module, function). Each takes the sub-instance
+# and returns (routes, cost).
+SOLVERS = {
+    "sa": ("Simulated annealing", "simulated_annealing"),
+    "basic_vns": ("basic_VNS", "basic_vns"),
+    "skewed_vns": ("skewed_vns", "skewed_vns"),
+}
+
+PARTITIONS = ("kmeans", "routes")
+
+# Points assigned to their nearest centre per vectorized block.
+KMEANS_BLOCK = 4096
+KMEANS_ITERATIONS = 20
+
+# Neighbours per customer looked at to find the ones on a cluster border.
+BORDER_K = 10
+
+
+# ----------- Partitioning -----------
+def kmeans(points, k, rng, iterations=KMEANS_ITERATIONS):
+    """Lloyd's k-means from k distinct random points; returns the cluster
+    label of every point. A centre left without points stays where it was."""
+    centers = points[rng.sample(range(len(points)), k)]
+    labels = np.zeros(len(points), dtype=np.int64)
+    for _ in range(iterations):
+        for start in range(0, len(points), KMEANS_BLOCK):
+            block = points[start:start + KMEANS_BLOCK]
+            d = ((block[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+            labels[start:start + KMEANS_BLOCK] = d.argmin(axis=1)
+        counts = np.bincount(labels, minlength=k)
+        sums = np.zeros_like(centers)
+        np.add.at(sums, labels, points)
+        moved = counts > 0
+        updated = centers.copy()
+        updated[moved] = sums[moved] / counts[moved, None]
+        if np.array_equal(updated, centers):
+            break
+        centers = updated
+    return labels
+
+
+def partition_customers(vrp_data, cluster_size, method, rng):
+    """Customer lists of the clusters, about ``cluster_size`` customers each.
+
+    "kmeans" clusters the customers' coordinates; "routes" clusters the
+    barycentres of sweep sectors, so each sector's customers stay together.
+    """
+    customers = vrp_data.customers
+    k = max(1, math.ceil(len(customers) / cluster_size))
+    if method == "kmeans":
+        labels = kmeans(vrp_data.xy[customers], min(k, len(customers)), rng)
+        return [customers[labels == c].tolist() for c in range(k) if np.any(labels == c)]
+    if method == "routes":
+        routes = [route[1:-1] for route in sweep_sectors(vrp_data)]
+        centres = np.array([vrp_data.xy[route].mean(axis=0) for route in routes])
+        labels = kmeans(centres, min(k, len(routes)), rng)
+        clusters = [[] for _ in range(k)]
+        for route, label in zip(routes, labels.tolist()):
+            clusters[label].extend(route)
+        return [cluster for cluster in clusters if cluster]
+    raise ValueError(f"Unknown partition method: {method}")
+
+
+def cluster_instance(vrp_data, nodes):
+    """The sub-instance of the depot and ``nodes``, renumbered from 1 (the
+    depot) so everything built from it is sized by the cluster. Returns the
+    instance dict and the original id of each new id - 1."""
+    ids = [vrp_data["depot"]] + list(nodes)
+    xy = vrp_data.xy[ids].tolist()
+    demands = vrp_data.demand_array[ids].tolist()
+    data = {
+        "node_coords": {i: tuple(point) for i, point in enumerate(xy, 1)},
+        "demands": dict(enumerate(demands, 1)),
+        "capacity": vrp_data["capacity"],
+        "depot": 1,
+    }
+    return data, ids
+
+
+# ----------- Cluster Solving -----------
+def _solve_cluster(task):
+    data, options, solver, params, rng = task
+    module, function = SOLVERS[solver]
+    solve = getattr(importlib.import_module(module), function)
+    routes, _ = solve(VRPProblem(data, **options), rng=rng, **params)
+    return routes
+
+
+def solve_clusters(vrp_data, clusters, solver, params, options, rng, workers=1):
+    """Solves every cluster on its own with ``solver`` and returns all the
+    routes in original node ids. Clusters run in ``workers`` processes, each
+    sent only its own cluster; each draws from its own substream of ``rng``,
+    so the result does not depend on the number of workers."""
+    instances = [cluster_instance(vrp_data, nodes) for nodes in clusters]
+    tasks = [(data, options, solver, params, stream)
+             for (data, _), stream in zip(instances, substreams(rng, len(instances)))]
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(min(workers, len(tasks))) as executor:
+            results = list(executor.map(_solve_cluster, tasks))
+    else:
+        results = [_solve_cluster(task) for task in tasks]
+
+    routes = []
+    for (_, ids), cluster_routes in zip(instances, results):
+        routes.extend([ids[node - 1] for node in route] for route in cluster_routes if len(route) > 2)
+    return routes
+
+
+# ----------- Global Repair -----------
+def repair(vrp_data, routes, clusters, ls_options):
+    """One local-search pass over the stitched routes, started only from the
+    customers with a near neighbour in another cluster: the routes inside a
+    cluster are already optimized, the seams between clusters are not."""
+    label = {node: c for c, nodes in enumerate(clusters) for node in nodes}
+    neighbors = vrp_data.nearest_customers(BORDER_K)
+    solution = Solution(vrp_data, routes)
+    for idx in range(len(solution.routes)):
+        solution.mark_optimal(idx)
+    solution.inter_touched = {node for node in label
+                              if any(label[other] != label[node] for other in neighbors[node])}
+    return local_search_vrp(vrp_data, solution, **dict(ls_options, inter_route=True))
+
+
+def decompose_solve(vrp_data, cluster_size=1000, partition="kmeans", solver="basic_vns", params=None,
+                    options=None, ls_options=None, rng=None, workers=1):
+    """Cluster first, route second: partitions the customers, solves each
+    cluster independently, stitches the routes and repairs the seams.
+    Returns (routes, cost)."""
+    rng = rng or make_rng()
+    ls_options = dict(ls_options or {}, workers=1)
+    params = dict(params or {}, ls_options=ls_options)
+    clusters = partition_customers(vrp_data, cluster_size, partition, rng)
+    print(f" {len(clusters)} clusters, largest {max(map(len, clusters))} customers")
+    routes = solve_clusters(vrp_data, clusters, solver, params, options or {}, rng, workers)
+    stitched = Solution(vrp_data, routes).total_cost
+    solution = repair(vrp_data, routes, clusters, ls_options)
+    print(f" Stitched cost: {stitched:.2f}, after repair: {solution.total_cost:.2f}")
+    return solution.routes, solution.total_cost
+
+
+def save_tour(routes, path, total_cost):
+    with open(path, 'w') as f:
+        for i, route in enumerate(routes):
+            f.write(f"Route {i+1}: {' '.join(map(str, route[1:-1]))}\n")
+        f.write(f"Total cost: {total_cost:.2f}\n")
+
+
+# ----------- Main -----------
+def main():
+    parser = argparse.ArgumentParser(description="Cluster-first route-second VRP solver for very large instances")
+    parser.add_argument('--vrp', type=str, required=True, help='Path to .vrp file')
+    parser.add_argument('--save_tour', type=str, default='decomposed_solution.tour', help='Output tour file')
+    parser.add_argument('--solver', choices=list(SOLVERS), default='basic_vns', help='Solver run on each cluster')
+    parser.add_argument('--partition', choices=PARTITIONS, default='kmeans',
+                        help='Cluster customers by k-means on their coordinates, or sweep routes by barycentre')
+    parser.add_argument('--cluster_size', type=int, default=1000, help='Target customers per cluster')
+    parser.add_argument('--max_iter', type=int, default=50, help='Solver iterations per cluster')
+    parser.add_argument('--radius', type=float, default=10, help='Radius for pairwise perturbation')
+    parser.add_argument('--cluster_time_limit', type=float, default=None,
+                        help='Wall-clock budget in seconds per cluster; replaces --max_iter')
+    add_distance_arguments(parser)
+    add_local_search_arguments(parser)
+    add_seed_argument(parser)
+    args = parser.parse_args()
+
+    # The whole instance only answers the repair pass, lazily; the clusters
+    # use the distance store asked for.
+    options = distance_options(args)
+    cache_dir = options.pop("cache_dir")
+    options.pop("cache_matrix")
+    print(" Loading VRP...")
+    vrp_data = parse_vrp(args.vrp, cache_dir=cache_dir, **dict(options, distance="lazy"))
+
+    print(f" Solving clusters with {args.solver} in {args.workers} process(es)...")
+    params = {"max_iter": args.max_iter, "radius": args.radius, "time_limit": args.cluster_time_limit}
+    best_routes, best_cost = decompose_solve(
+        vrp_data, cluster_size=args.cluster_size, partition=args.partition, solver=args.solver,
+        params=params, options=options, ls_options=local_search_options(args), rng=make_rng(args.seed),
+        workers=args.workers)
+
+    print(f" Final cost: {best_cost:.2f}")
+    save_tour(best_routes, args.save_tour, best_cost)
+    print(f" Tour saved to {args.save_tour}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import math
+from functools import lru_cache
+
+import numpy as np
+
+from spatial import GridIndex
+
+# Rows computed per vectorized block; bounds the temporary memory used while
+# filling the matrix to a few MB regardless of instance size.
+BLOCK_ROWS = 256
+
+DISTANCE_MODES = ("full", "knn", "lazy")
+
+
+# ----------- Coordinate Arrays -----------
+def coords_to_array(coords):
+    """Returns an (max_id + 1, 2) float64 array indexed directly by node id."""
+    nodes = sorted(coords)
+    xy = np.zeros((nodes[-1] + 1, 2), dtype=np.float64)
+    xy[nodes] = [coords[node] for node in nodes]
+    return xy
+
+
+def pairwise_distances(points_a, points_b):
+    return np.hypot(points_a[:, None, 0] - points_b[None, :, 0],
+                    points_a[:, None, 1] - points_b[None, :, 1])
+
+
+# ----------- Full Distance Matrix -----------
+class DistanceMatrix:
+    """Euclidean distances in one contiguous array; ``dist[i][j]`` by node id."""
+
+    def __init__(self, xy, dtype=np.float64):
+        size = len(xy)
+        self.array = np.empty((size, size), dtype=dtype)
+        for start in range(0, size, BLOCK_ROWS):
+            stop = min(start + BLOCK_ROWS, size)
+            self.array[start:stop] = pairwise_distances(xy[start:stop], xy)
+
+    @classmethod
+    def from_array(cls, array):
+        """Wraps an already computed matrix, e.g. one in shared memory."""
+        matrix = object.__new__(cls)
+        matrix.array = array
+        return matrix
+
+    def __getitem__(self, i):
+        return self.array[i]
+
+    def __len__(self):
+        return len(self.array)
+
+    def distance(self, i, j):
+        return float(self.array[i, j])
+
+    def route_cost(self, route):
+        return float(self.array[route[:-1], route[1:]].sum(dtype=np.float64))
+
+    def subarray(self, nodes):
+        idx = np.asarray(nodes)
+        return self.array[np.ix_(idx, idx)]
+
+    def submatrix(self, nodes):
+        """Distances between ``nodes`` as nested lists, indexed by position."""
+        # Python floats index far faster than NumPy scalars in tight loops.
+        return self.subarray(nodes).tolist()
+
+    def distances_from(self, i, nodes):
+        """Distances from ``i`` to each of ``nodes``, as an array."""
+        return self.array[i, nodes]
+
+
+# ----------- On-Demand Distances -----------
+class _DistanceRow:
+    __slots__ = ("oracle", "i")
+
+    def __init__(self, oracle, i):
+        self.oracle = oracle
+        self.i = i
+
+    def __getitem__(self, j):
+        return self.oracle.distance(self.i, j)
+
+
+class CoordinateDistance:
+    """Distances computed from the coordinates whenever they are asked for."""
+
+    def __init__(self, xy):
+        self.xy = xy
+        self.x = xy[:, 0].tolist()
+        self.y = xy[:, 1].tolist()
+
+    def __getitem__(self, i):
+        return _DistanceRow(self, i)
+
+    def __len__(self):
+        return len(self.xy)
+
+    def distance(self, i, j):
+        return math.hypot(self.x[i] - self.x[j], self.y[i] - self.y[j])
+
+    def route_cost(self, route):
+        distance = self.distance
+        return sum(distance(route[i], route[i + 1]) for i in range(len(route) - 1))
+
+    def subarray(self, nodes):
+        pts = self.xy[np.asarray(nodes)]
+        return pairwise_distances(pts, pts)
+
+    def submatrix(self, nodes):
+        return self.subarray(nodes).tolist()
+
+    def distances_from(self, i, nodes):
+        return pairwise_distances(self.xy[i:i + 1], self.xy[nodes])[0]
+
+
+class NeighborDistance(CoordinateDistance):
+    """Keeps only the k nearest neighbours of each node, O(n * k) memory.
+
+    A pair stored in the row of its lower node id is answered from it; any
+    other pair is computed from the coordinates. Looking pairs up from one
+    end only keeps ``distance(i, j) == distance(j, i)``.
+    """
+
+    def __init__(self, xy, nodes, k=16):
+        super().__init__(xy)
+        self.neighbors, self.neighbor_dist = GridIndex(xy, nodes).nearest_neighbors(k)
+        self.stored = [dict(zip(row, dist)) for row, dist in
+                       zip(self.neighbors.tolist(), self.neighbor_dist.tolist())]
+
+    def distance(self, i, j):
+        d = self.stored[i].get(j) if i < j else self.stored[j].get(i)
+        return d if d is not None else super().distance(i, j)
+
+
+class LazyDistance(CoordinateDistance):
+    """On-demand distances behind a bounded LRU cache of hot pairs."""
+
+    def __init__(self, xy, cache_size=200_000):
+        super().__init__(xy)
+        self._cached = lru_cache(maxsize=cache_size)(super().distance)
+
+    def distance(self, i, j):
+        return self._cached(i, j) if i < j else self._cached(j, i)
+
+
+def make_distance_oracle(xy, nodes, mode="full", dtype="float64", k=16, cache_size=200_000):
+    """Builds the distance store every solver reads through ``dist[i][j]``,
+    ``distance(i, j)``, ``route_cost(route)``, ``distances_from(i, nodes)``,
+    ``submatrix(nodes)`` and ``subarray(nodes)``.
+    ``xy`` is indexed by node id and ``nodes`` lists the ids in use."""
+    if mode == "full":
+        return DistanceMatrix(xy, dtype=dtype)
+    if mode == "knn":
+        return NeighborDistance(xy, nodes, k=k)
+    if mode == "lazy":
+        return LazyDistance(xy, cache_size=cache_size)
+    raise ValueError(f"Unknown distance mode: {mode}")
@@ -1,117 +1,54 @@
 import argparse
-import math
+import bisect
 import os
 
-def parse_vrp(vrp_path):
-    with open(vrp_path, 'r') as file:
-        lines = file.readlines()
-
-    coords = {}
-    demands = {}
-    depot = None
-    dimension = 0
-    capacity = 0
-
-    node_section = False
-    demand_section = False
-    depot_section = False
-
-    for line in lines:
-        line = line.strip()
-        if line.startswith("DIMENSION"):
-            dimension = int(line.split(":")[1].strip())
-        elif line.startswith("CAPACITY"):
-            capacity = int(line.split(":")[1].strip())
-        elif line.startswith("NODE_COORD_SECTION"):
-            node_section = True
-            demand_section = depot_section = False
-            continue
-        elif line.startswith("DEMAND_SECTION"):
-            demand_section = True
-            node_section = depot_section = False
-            continue
-        elif line.startswith("DEPOT_SECTION"):
-            depot_section = True
-            node_section = demand_section = False
-            continue
-        elif line.startswith("EOF"):
-            break
-
-        if node_section:
-            parts = line.split()
-            if len(parts) >= 3:
-                idx = int(parts[0])
-                x = float(parts[1])
-                y = float(parts[2])
-                coords[idx] = (x, y)
-        elif demand_section:
-            parts = line.split()
-            if len(parts) >= 2:
-                idx = int(parts[0])
-                demand = int(parts[1])
-                demands[idx] = demand
-        elif depot_section:
-            if line == "-1":
-                depot_section = False
-            else:
-                depot = int(line)
-
-    if depot is None:
-        depot = 1  # Default depot
-
-    return {
-        "dimension": dimension,
-        "capacity": capacity,
-        "node_coords": coords,
-        "demands": demands,
-        "depot": depot
-    }
-
-def compute_distance_matrix(coords):
-    nodes = sorted(coords.keys())
-    dist_matrix = {}
-    for i in nodes:
-        dist_matrix[i] = {}
-        xi, yi = coords[i]
-        for j in nodes:
-            if i == j:
-                dist_matrix[i][j] = 0.0
-            else:
-                xj, yj = coords[j]
-                dist_matrix[i][j] = math.hypot(xi - xj, yi - yj)
-    return dist_matrix
+from construction import savings_init, sweep_init
+from problem import add_distance_arguments, distance_options, parse_vrp
 
 def route_cost(route, dist_matrix):
     return sum(dist_matrix[route[i]][route[i+1]] for i in range(len(route) - 1))
 
 def compute_total_cost(vrp_data, routes):
-    dist_matrix = compute_distance_matrix(vrp_data["node_coords"])
+    dist_matrix = vrp_data.dist_matrix
     total_cost = 0.0
     for route in routes:
         total_cost += route_cost(route, dist_matrix)
     return total_cost, dist_matrix
 
 def greedy_init(vrp_data):
-    coords = vrp_data["node_coords"]
-    demands = vrp_data["demands"]
+    """First-fit decreasing, one route at a time: each route takes the
+    largest remaining demand that still fits until none does (equal demands
+    in node order).
+
+    Customers are bucketed by demand with the distinct demands kept sorted,
+    so each pick is a bisect rather than a scan of every customer.
+    """
+    demands = vrp_data.demand_array
     capacity = vrp_data["capacity"]
     depot = vrp_data["depot"]
-    dist_matrix = compute_distance_matrix(coords)
 
-    unvisited = set(coords.keys()) - {depot}
+    buckets = {}
+    for node in sorted(vrp_data.customers.tolist(), reverse=True):
+        buckets.setdefault(int(demands[node]), []).append(node)
+    sizes = sorted(buckets)
     routes = []
 
-    while unvisited:
+    while sizes:
         route = [depot]
-        load = 0
-        current = depot
-
-        candidates = sorted(unvisited, key=lambda x: demands.get(x, 0), reverse=True)
-        for node in candidates:
-            if node in unvisited and load + demands[node] <= capacity:
-                route.append(node)
-                load += demands[node]
-                unvisited.remove(node)
+        room = capacity
+
+        while True:
+            i = bisect.bisect_right(sizes, room) - 1
+            if i < 0:
+                break
+            bucket = buckets[sizes[i]]
+            route.append(bucket.pop())
+            room -= sizes[i]
+            if not bucket:
+                del buckets[sizes[i]]
+                sizes.pop(i)
+        if len(route) == 1:
+            raise ValueError("A customer's demand exceeds the vehicle capacity")
         route.append(depot)
         routes.append(route)
 
@@ -139,8 +76,11 @@ def main():
     parser.add_argument('--vrp', type=str, help='Input .vrp file path')
     parser.add_argument('--par', type=str, help='Parameter file path')
     parser.add_argument('--save_tour', type=str, default='greedy_solution.tour', help='Path to save output tour')
+    add_distance_arguments(parser)
     args = parser.parse_args()
 
+    init_strategy = "greedy"
+
     if args.par:
         with open(args.par, 'r') as f:
             for line in f:
@@ -148,15 +88,25 @@ def main():
                     args.vrp = line.split("=")[1].strip()
                 elif "INITIAL_SOLUTION" in line:
                     init_sol_path = line.split("=")[1].strip()
+                elif "INIT_STRATEGY" in line:
+                    init_strategy = line.split("=")[1].strip().lower()
 
-    vrp_data = parse_vrp(args.vrp)
+    vrp_data = parse_vrp(args.vrp, **distance_options(args))
 
     if 'init_sol_path' in locals() and os.path.exists(init_sol_path):
         print("Using initial solution from .tour file")
         routes = parse_initial_tour(init_sol_path, vrp_data["depot"])
-    else:
+    elif init_strategy == "greedy":
         print("Generating greedy initial solution")
         routes = greedy_init(vrp_data)
+    elif init_strategy == "savings":
+        print("Generating savings initial solution")
+        routes = savings_init(vrp_data)
+    elif init_strategy == "sweep":
+        print("Generating sweep initial solution")
+        routes = sweep_init(vrp_data)
+    else:
+        raise ValueError(f"Unknown INIT_STRATEGY: {init_strategy}")
 
     total_cost, _ = compute_total_cost(vrp_data, routes)
     save_tour(routes, args.save_tour, total_cost)
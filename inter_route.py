@@ -0,0 +1,168 @@
+from collections import deque
+
+from solution import changed_endpoints
+
+# Nearest customers each customer is paired with when no candidate lists
+# are set on the instance.
+NEIGHBORS_K = 10
+# Longest chain of consecutive customers an Or-opt move relocates.
+MAX_SEGMENT = 3
+
+
+# ----------- Inter-Route Local Search -----------
+def inter_route_search(vrp_data, solution, neighbors_k=NEIGHBORS_K):
+    """Moves customers between the routes of ``solution`` in place, first
+    improvement, and returns it.
+
+    Tries relocate and Or-opt (chains of up to MAX_SEGMENT customers), swap
+    and 2-opt* moves that put a customer next to one of its nearest
+    customers in another route. Moves are scored from the edges they remove
+    and add and checked against the cached route loads; only customers next
+    to a change since the last search are re-examined. Routes left empty
+    are dropped.
+    """
+    depot = vrp_data["depot"]
+    neighbors = vrp_data.candidates
+    if neighbors is None:
+        neighbors = vrp_data.nearest_customers(neighbors_k)
+
+    route_of, pos_of = {}, {}
+
+    def index(idx):
+        route = solution.routes[idx]
+        for p in range(1, len(route) - 1):
+            route_of[route[p]] = idx
+            pos_of[route[p]] = p
+
+    for idx in range(len(solution.routes)):
+        index(idx)
+
+    if solution.inter_touched is None:
+        start = [node for route in solution.routes for node in route[1:-1]]
+    else:
+        start = sorted(node for node in solution.inter_touched if node in route_of)
+    queue = deque(start)
+    queued = set(start)
+
+    while queue:
+        u = queue.popleft()
+        queued.discard(u)
+        move = _find_move(u, solution, route_of, pos_of, neighbors, vrp_data)
+        if move is None:
+            continue
+        for idx, route in move:
+            old_route = solution.routes[idx]
+            solution.set_route(idx, route)
+            for node in changed_endpoints(old_route, route):
+                if node != depot and node not in queued:
+                    queued.add(node)
+                    queue.append(node)
+        for idx, _ in move:
+            index(idx)
+
+    solution.drop_empty_routes()
+    solution.inter_touched = set()
+    return solution
+
+
+def _find_move(u, solution, route_of, pos_of, neighbors, vrp_data):
+    # Returns [(route index, new route), ...] for the first improving move
+    # that makes u adjacent to one of its neighbours, or None.
+    a = route_of[u]
+    for v in neighbors[u]:
+        b = route_of.get(v, a)
+        if b == a:
+            continue
+        for try_move in (_relocate_move, _swap_move, _two_opt_star_move):
+            move = try_move(u, v, a, b, solution, pos_of, vrp_data)
+            if move is not None:
+                return move
+    return None
+
+
+def _load(nodes, demands):
+    return sum(demands[node] for node in nodes)
+
+
+def _relocate_move(u, v, a, b, solution, pos_of, vrp_data):
+    # Moves a chain of 1..MAX_SEGMENT customers with u at one end from
+    # route a into route b, u first next to v: (v, u, ...) or (..., u, v).
+    d = solution.dist.distance
+    demands = vrp_data.demand_list
+    room = vrp_data["capacity"] - solution.loads[b]
+    ra, rb = solution.routes[a], solution.routes[b]
+    i, j = pos_of[u], pos_of[v]
+    last = len(ra) - 2
+
+    for length in range(1, MAX_SEGMENT + 1):
+        for lo in ((i,) if length == 1 else (i, i - length + 1)):
+            hi = lo + length - 1
+            if lo < 1 or hi > last:
+                continue
+            segment = ra[lo:hi + 1]
+            if _load(segment, demands) > room:
+                continue
+            p, q = ra[lo - 1], ra[hi + 1]
+            removed = d(p, segment[0]) + d(segment[-1], q) - d(p, q)
+            if segment[0] != u:
+                segment = segment[::-1]
+
+            x, y = v, rb[j + 1]
+            added = d(x, u) + d(segment[-1], y) - d(x, y)
+            if added - removed < -1e-9:
+                return [(a, ra[:lo] + ra[hi + 1:]), (b, rb[:j + 1] + segment + rb[j + 1:])]
+
+            x, y = rb[j - 1], v
+            added = d(x, segment[-1]) + d(u, y) - d(x, y)
+            if added - removed < -1e-9:
+                return [(a, ra[:lo] + ra[hi + 1:]), (b, rb[:j] + segment[::-1] + rb[j:])]
+    return None
+
+
+def _swap_move(u, v, a, b, solution, pos_of, vrp_data):
+    # Exchanges u with the customer just after or just before v.
+    d = solution.dist.distance
+    demands, capacity = vrp_data.demand_list, vrp_data["capacity"]
+    ra, rb = solution.routes[a], solution.routes[b]
+    i, j = pos_of[u], pos_of[v]
+    du = demands[u]
+
+    for k in (j + 1, j - 1):
+        if not 1 <= k <= len(rb) - 2:
+            continue
+        w = rb[k]
+        dw = demands[w]
+        if solution.loads[a] - du + dw > capacity or solution.loads[b] - dw + du > capacity:
+            continue
+        u_prev, u_next = ra[i - 1], ra[i + 1]
+        w_prev, w_next = rb[k - 1], rb[k + 1]
+        delta = (d(u_prev, w) + d(w, u_next) - d(u_prev, u) - d(u, u_next)
+                 + d(w_prev, u) + d(u, w_next) - d(w_prev, w) - d(w, w_next))
+        if delta < -1e-9:
+            return [(a, ra[:i] + [w] + ra[i + 1:]), (b, rb[:k] + [u] + rb[k + 1:])]
+    return None
+
+
+def _two_opt_star_move(u, v, a, b, solution, pos_of, vrp_data):
+    # Cuts both routes and swaps their tails so u and v become adjacent.
+    # Loads are only checked for moves that would gain.
+    d = solution.dist.distance
+    demands, capacity = vrp_data.demand_list, vrp_data["capacity"]
+    ra, rb = solution.routes[a], solution.routes[b]
+    i, j = pos_of[u], pos_of[v]
+    load_a, load_b = solution.loads[a], solution.loads[b]
+
+    # (..., u, v, ...): a keeps its head up to u, b its head before v.
+    delta = d(u, v) + d(rb[j - 1], ra[i + 1]) - d(u, ra[i + 1]) - d(rb[j - 1], v)
+    if delta < -1e-9:
+        head_a, head_b = _load(ra[1:i + 1], demands), _load(rb[1:j], demands)
+        if head_a + load_b - head_b <= capacity and head_b + load_a - head_a <= capacity:
+            return [(a, ra[:i + 1] + rb[j:]), (b, rb[:j] + ra[i + 1:])]
+
+    # (..., v, u, ...): b keeps its head up to v, a its head before u.
+    delta = d(v, u) + d(ra[i - 1], rb[j + 1]) - d(ra[i - 1], u) - d(v, rb[j + 1])
+    if delta < -1e-9:
+        head_a, head_b = _load(ra[1:i], demands), _load(rb[1:j + 1], demands)
+        if head_a + load_b - head_b <= capacity and head_b + load_a - head_a <= capacity:
+            return [(a, ra[:i] + rb[j + 1:]), (b, rb[:j + 1] + ra[i:])]
+    return None
@@ -0,0 +1,261 @@
+from bisect import bisect_left
+from collections import deque
+
+import numpy as np
+
+from inter_route import inter_route_search
+
+# "python" searches move by move; "numpy" scores every move of a sweep at once.
+ENGINES = ("python", "numpy")
+
+
+# ----------- Intra-Route 2-Opt -----------
+def two_opt_route(route, dist_matrix, candidates=None, dont_look=False, active=None,
+                  engine="python"):
+    """2-opt on a single route (depot at both ends), first improvement.
+
+    With ``candidates`` (the K nearest customers of each node, by node id)
+    only moves that add an edge to one of those neighbours are tried.
+    With ``dont_look`` only nodes next to a recent change are re-examined,
+    starting from the node ids in ``active`` (default: every node).
+    The "numpy" ``engine`` ignores all three, see ``two_opt_route_numpy``.
+    """
+    if engine == "numpy":
+        return two_opt_route_numpy(route, dist_matrix)
+    if engine != "python":
+        raise ValueError(f"Unknown 2-opt engine: {engine}")
+
+    # The search runs on positions into the route's own distance submatrix.
+    dist = dist_matrix.submatrix(route)
+    best = list(range(len(route)))
+    cand = None
+    if candidates is not None:
+        local = {node: k for k, node in enumerate(route)}
+        cand = [[local[v] for v in candidates[node] if v in local] for node in route]
+
+    if dont_look:
+        start = best if active is None else [k for k, node in enumerate(route) if node in active]
+        _two_opt_queue(best, dist, cand, start)
+    elif cand is None:
+        _two_opt_full(best, dist)
+    else:
+        _two_opt_candidates(best, dist, cand)
+    return [route[k] for k in best]
+
+
+def _positions(best):
+    pos = [0] * len(best)
+    for p, k in enumerate(best):
+        pos[k] = p
+    return pos
+
+
+def _reverse(best, pos, lo, hi):
+    best[lo:hi + 1] = reversed(best[lo:hi + 1])
+    for p in range(lo, hi + 1):
+        pos[best[p]] = p
+
+
+def _two_opt_full(best, dist):
+    # Each move is scored from the two edges it removes and the two it adds;
+    # the segment is only reversed (in place) once the move is accepted.
+    n = len(best)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, n - 2):
+            a, b = best[i - 1], best[i]
+            dist_a = dist[a]
+            for j in range(i + 2, n):
+                c, e = best[j - 1], best[j]
+                delta = dist_a[c] + dist[b][e] - dist_a[b] - dist[c][e]
+                if delta < -1e-9:
+                    best[i:j] = reversed(best[i:j])
+                    b = best[i]
+                    improved = True
+
+
+def _full_move(i, best, dist):
+    # Pairs the edge ending at position i with every other edge; the
+    # segment between them is reversed. Returns (lo, hi) inclusive or None.
+    n = len(best)
+    a, b = best[i - 1], best[i]
+    dist_a, dist_b = dist[a], dist[b]
+    d_ab = dist_a[b]
+    for j in range(1, n):
+        if -2 < j - i < 2:
+            continue
+        c, e = best[j - 1], best[j]
+        if dist_a[c] + dist_b[e] - d_ab - dist[c][e] < -1e-9:
+            return (i, j - 1) if j > i else (j, i - 1)
+    return None
+
+
+def _candidate_move(i, best, pos, dist, cand):
+    # A move removing the edge (a, b) can only gain if one of its new edges
+    # is shorter than (a, b), so try (a, c) + (b, succ c) and then
+    # (b, c) + (a, pred c), scanning the neighbours nearest first.
+    a, b = best[i - 1], best[i]
+    d_ab = dist[a][b]
+
+    for c in cand[a]:
+        d_ac = dist[a][c]
+        if d_ac >= d_ab:
+            break
+        p = pos[c]
+        e = best[p + 1]
+        if d_ac + dist[b][e] - d_ab - dist[c][e] < -1e-9:
+            return (i, p) if p > i - 1 else (p + 1, i - 1)
+
+    for c in cand[b]:
+        d_bc = dist[b][c]
+        if d_bc >= d_ab:
+            break
+        p = pos[c]
+        f = best[p - 1]
+        if d_bc + dist[a][f] - d_ab - dist[f][c] < -1e-9:
+            return (i, p - 1) if p > i else (p, i - 1)
+    return None
+
+
+def _two_opt_candidates(best, dist, cand):
+    n = len(best)
+    pos = _positions(best)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, n):
+            segment = _candidate_move(i, best, pos, dist, cand)
+            if segment is not None:
+                _reverse(best, pos, *segment)
+                improved = True
+
+
+def _two_opt_queue(best, dist, cand, start):
+    # Don't-look bits: a node whose incident edges gave no improving move is
+    # dropped from the queue and only re-queued when one of them changes.
+    n = len(best)
+    pos = _positions(best)
+    queue = deque(start)
+    active = [False] * n
+    for v in start:
+        active[v] = True
+    while queue:
+        v = queue.popleft()
+        active[v] = False
+        p = pos[v]
+        for i in (p, p + 1):
+            if not 1 <= i < n:
+                continue
+            if cand is None:
+                segment = _full_move(i, best, dist)
+            else:
+                segment = _candidate_move(i, best, pos, dist, cand)
+            if segment is not None:
+                lo, hi = segment
+                _reverse(best, pos, lo, hi)
+                for k in (lo - 1, lo, hi, hi + 1):
+                    u = best[k]
+                    if not active[u]:
+                        active[u] = True
+                        queue.append(u)
+                break
+
+
+def two_opt_route_numpy(route, dist_matrix):
+    """2-opt on a single route with the gain of every move computed at once
+    as an array over the route's distance submatrix.
+
+    Each sweep applies the best improving move plus every other improving
+    move, best first, whose edges do not overlap a move already taken.
+    """
+    n = len(route)
+    if n < 5:
+        return list(route)
+    # d is kept in the current route order. Move (k, l) replaces edges k
+    # and l by (k, l) and (k + 1, l + 1), reversing positions k + 1..l.
+    d = np.array(dist_matrix.subarray(route), dtype=np.float64)
+    excluded = np.where(np.triu(np.ones((n - 1, n - 1), dtype=bool), k=2), 0.0, np.inf)
+    delta = np.empty((n - 1, n - 1))
+    order = np.arange(n)
+    while True:
+        edges = np.diagonal(d, offset=1)[:, None]
+        np.add(d[:-1, :-1], d[1:, 1:], out=delta)
+        delta -= edges
+        delta -= edges.T
+        delta += excluded
+        flat = delta.ravel()
+        moves = np.flatnonzero(flat < -1e-9)
+        if not len(moves):
+            break
+        if len(moves) > n:
+            moves = moves[np.argpartition(flat[moves], n)[:n]]
+        moves = moves[np.argsort(flat[moves], kind="stable")]
+
+        # Taken moves span disjoint edge ranges, kept sorted by first edge.
+        starts, ends = [], []
+        for k, l in zip(*(axis.tolist() for axis in np.unravel_index(moves, delta.shape))):
+            p = bisect_left(starts, k)
+            if (p < len(starts) and starts[p] <= l) or (p > 0 and ends[p - 1] >= k):
+                continue
+            starts.insert(p, k)
+            ends.insert(p, l)
+            order[k + 1:l + 1] = order[k + 1:l + 1][::-1]
+            d[k + 1:l + 1] = d[k + 1:l + 1][::-1]
+            d[:, k + 1:l + 1] = d[:, k + 1:l + 1][:, ::-1]
+    return [route[p] for p in order.tolist()]
+
+
+def two_opt_vrp(vrp_data, solution, dirty=None, dont_look=False, engine="python", workers=1):
+    """Runs 2-opt on the routes of ``solution`` in place and returns it.
+
+    Only routes in ``dirty`` (default: all) that are not already flagged
+    locally optimal are searched, and only those it changed are recosted.
+    With ``dont_look`` the search starts from the nodes the route's last
+    changes touched rather than from every node. ``engine`` picks the
+    route search, one of ENGINES. With ``workers`` > 1 the routes are
+    spread over the instance's process pool.
+    """
+    dist_matrix = vrp_data.dist_matrix
+    indices = range(len(solution.routes)) if dirty is None else sorted(dirty)
+    indices = [idx for idx in indices if not solution.locally_optimal[idx]]
+    routes = [solution.routes[idx] for idx in indices]
+    if workers > 1 and len(indices) > 1:
+        new_routes = vrp_data.worker_pool(workers).two_opt_routes(
+            routes, dont_look, [solution.touched[idx] for idx in indices], engine)
+    else:
+        new_routes = [two_opt_route(route, dist_matrix, vrp_data.candidates, dont_look,
+                                    solution.touched[idx], engine)
+                      for idx, route in zip(indices, routes)]
+
+    for idx, route, new_route in zip(indices, routes, new_routes):
+        if new_route != route:
+            solution.set_route(idx, new_route)
+        solution.mark_optimal(idx)
+    return solution
+
+
+def local_search_vrp(vrp_data, solution, inter_route=False, dont_look=False, engine="python",
+                     workers=1):
+    """The solvers' local-search step: inter-route moves when enabled,
+    then 2-opt on every route. Works in place and returns ``solution``."""
+    if inter_route:
+        inter_route_search(vrp_data, solution)
+    return two_opt_vrp(vrp_data, solution, dont_look=dont_look, engine=engine, workers=workers)
+
+
+# ----------- Command Line Options -----------
+def add_local_search_arguments(parser):
+    parser.add_argument('--dont_look', action='store_true',
+                        help="Use don't-look bits: only re-examine nodes next to recent 2-opt changes")
+    parser.add_argument('--inter_route', action='store_true',
+                        help='Also move customers between routes (relocate, Or-opt, swap, 2-opt*)')
+    parser.add_argument('--engine', choices=ENGINES, default='python',
+                        help='2-opt engine: python (move by move) or numpy (all moves of a sweep at once)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Processes running 2-opt on different routes in parallel')
+
+
+def local_search_options(args):
+    return {"dont_look": args.dont_look, "inter_route": args.inter_route, "engine": args.engine,
+            "workers": args.workers}
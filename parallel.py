@@ -0,0 +1,118 @@
+import atexit
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from distances import DistanceMatrix
+from local_search import local_search_vrp, two_opt_route
+from seeding import substreams
+from shaking import random_exchange
+from solution import Solution
+
+# State each worker process sets up once, when the pool starts it.
+_worker = {}
+
+
+# ----------- Worker Side -----------
+def _init_worker(rebuild, args, spec):
+    problem = rebuild(*args)
+    if spec is not None:
+        _, name, shape, dtype = spec
+        shm = shared_memory.SharedMemory(name=name)
+        _worker["shm"] = shm
+        problem.dist_matrix = DistanceMatrix.from_array(np.ndarray(shape, dtype=dtype, buffer=shm.buf))
+    _worker["problem"] = problem
+
+
+def worker_problem():
+    """The instance as seen from inside a pool worker."""
+    return _worker["problem"]
+
+
+def _run_task(fn_task):
+    fn, task = fn_task
+    return fn(task)
+
+
+def _two_opt_task(task):
+    route, dont_look, active, engine = task
+    problem = worker_problem()
+    return two_opt_route(route, problem.dist_matrix, problem.candidates, dont_look, active, engine)
+
+
+def _shake_and_search_task(task):
+    state, m, radius, rng, ls_options = task
+    vrp_data = worker_problem()
+    shaken = random_exchange(Solution.from_state(vrp_data, state), m, radius,
+                             neighbors=vrp_data.shaking_neighbors(radius), rng=rng)
+    return local_search_vrp(vrp_data, shaken, **ls_options).state()
+
+
+# ----------- Worker Pool -----------
+class WorkerPool:
+    """Process pool whose workers each hold a copy of the instance.
+
+    A full distance matrix is not pickled: it is copied once into a
+    shared-memory block every worker maps read-only, or, if it is already
+    memory-mapped from the instance cache, each worker maps the same file.
+    The instance goes over as it pickles (its arrays and options) and the
+    other stores are rebuilt from the coordinates in each worker. Results come back in task
+    order, so they do not depend on the number of workers.
+    """
+
+    def __init__(self, vrp_data, workers):
+        self.workers = workers
+        self._shm = None
+        spec = None
+        dist_matrix = vrp_data.dist_matrix
+        if isinstance(dist_matrix, DistanceMatrix) and not isinstance(dist_matrix.array, np.memmap):
+            array = dist_matrix.array
+            self._shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=self._shm.buf)[:] = array
+            spec = ("shared", self._shm.name, array.shape, array.dtype.str)
+        rebuild, args = vrp_data.__reduce__()
+        self._executor = ProcessPoolExecutor(workers, initializer=_init_worker,
+                                             initargs=(rebuild, args, spec))
+        atexit.register(self.close)
+
+    def map(self, fn, tasks, chunksize=1):
+        """[fn(task) for task in tasks], run in the workers; ``fn`` must be
+        a module-level function."""
+        return list(self._executor.map(_run_task, [(fn, task) for task in tasks],
+                                       chunksize=chunksize))
+
+    def two_opt_routes(self, routes, dont_look=False, active=None, engine="python"):
+        """two_opt_route on every route, ``active`` holding one entry per
+        route (or None), returned as a list in the same order."""
+        if active is None:
+            active = [None] * len(routes)
+        tasks = [(route, dont_look, nodes, engine) for route, nodes in zip(routes, active)]
+        return self.map(_two_opt_task, tasks, chunksize=max(1, len(tasks) // (4 * self.workers)))
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+
+# ----------- Batched Shaking -----------
+def shake_and_search(vrp_data, solution, m, radius, batch, rng, ls_options=None, workers=None):
+    """``batch`` shakes of ``solution`` (m exchanges each), each followed by
+    local search, run in the instance's worker pool: ``workers`` processes
+    when more than one, else one per shake. Returns the resulting Solutions
+    in shake order.
+
+    Each shake draws from its own substream of ``rng``, so the results do
+    not depend on the number of workers.
+    """
+    ls_options = dict(ls_options or {}, workers=1)
+    state = solution.state()
+    tasks = [(state, m, radius, stream, ls_options) for stream in substreams(rng, batch)]
+    pool = vrp_data.worker_pool(workers if workers and workers > 1 else batch)
+    states = pool.map(_shake_and_search_task, tasks)
+    return [Solution.from_state(vrp_data, state) for state in states]
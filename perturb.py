@@ -205,65 +205,11 @@
 
 
 import argparse
-import random
-import math
-
-def parse_vrp(vrp_path):
-    coords = {}
-    demands = {}
-    depot = None
-
-    with open(vrp_path, 'r') as file:
-        lines = file.readlines()
-
-    node_section = False
-    demand_section = False
-    depot_section = False
-
-    for line in lines:
-        line = line.strip()
-        if line.startswith("NODE_COORD_SECTION"):
-            node_section = True
-            demand_section = depot_section = False
-            continue
-        elif line.startswith("DEMAND_SECTION"):
-            demand_section = True
-            node_section = depot_section = False
-            continue
-        elif line.startswith("DEPOT_SECTION"):
-            depot_section = True
-            node_section = demand_section = False
-            continue
-        elif line.startswith("EOF"):
-            break
-
-        if node_section:
-            parts = line.split()
-            if len(parts) >= 3:
-                idx = int(parts[0])
-                x = float(parts[1])
-                y = float(parts[2])
-                coords[idx] = (x, y)
-        elif demand_section:
-            parts = line.split()
-            if len(parts) >= 2:
-                idx = int(parts[0])
-                demand = int(parts[1])
-                demands[idx] = demand
-        elif depot_section:
-            if line == "-1":
-                depot_section = False
-            else:
-                depot = int(line)
-
-    if depot is None:
-        depot = 1  # Default depot
-
-    return {
-        "coords": coords,
-        "demands": demands,
-        "depot": depot
-    }
+
+from problem import add_distance_arguments, distance_options, parse_vrp
+from seeding import add_seed_argument, make_rng
+from shaking import random_exchange
+from solution import Solution
 
 def parse_tour(tour_path):
     routes = []
@@ -279,80 +225,6 @@ def parse_tour(tour_path):
                         routes.append(route_nodes)
     return routes
 
-def compute_distance(coords, i, j):
-    xi, yi = coords[i]
-    xj, yj = coords[j]
-    return math.hypot(xi - xj, yi - yj)
-
-def find_nearby_pairs(route, coords, radius=10):
-    pairs = []
-    nodes = route[1:-1]
-    for i in range(len(nodes)):
-        for j in range(i+1, len(nodes)):
-            if compute_distance(coords, nodes[i], nodes[j]) <= radius:
-                pairs.append((nodes[i], nodes[j]))
-    return pairs
-
-def random_exchange(routes, coords, m, radius=10):
-    all_routes = routes[:]
-    n = len(all_routes)
-
-    if n < 2:
-        print("Need at least two routes to perform exchanges.")
-        return all_routes
-
-    exchanges_done = 0
-    attempts = 0
-    max_attempts = m * 10
-
-    while exchanges_done < m and attempts < max_attempts:
-        attempts += 1
-
-        r1_idx, r2_idx = random.sample(range(n), 2)
-        r1 = all_routes[r1_idx]
-        r2 = all_routes[r2_idx]
-
-        pairs_r1 = find_nearby_pairs(r1, coords, radius)
-        pairs_r2 = find_nearby_pairs(r2, coords, radius)
-
-        if not pairs_r1 or not pairs_r2:
-            continue
-
-        pair1 = random.choice(pairs_r1)
-        pair2 = random.choice(pairs_r2)
-
-        def swap_pairs(route, old_pair, new_pair):
-            new_route = route[:]
-            for old_node in old_pair:
-                if old_node in new_route:
-                    new_route.remove(old_node)
-            insert_pos = 1
-            for node in new_pair:
-                new_route.insert(insert_pos, node)
-                insert_pos += 1
-            return new_route
-
-        new_r1 = swap_pairs(r1, pair1, pair2)
-        new_r2 = swap_pairs(r2, pair2, pair1)
-
-        all_routes[r1_idx] = new_r1
-        all_routes[r2_idx] = new_r2
-
-        exchanges_done += 1
-
-    if attempts >= max_attempts:
-        print("Reached maximum attempts during perturbation.")
-
-    return all_routes
-
-def compute_total_cost(vrp_data, routes):
-    coords = vrp_data["coords"]
-    total_cost = 0
-    for route in routes:
-        for i in range(len(route)-1):
-            total_cost += compute_distance(coords, route[i], route[i+1])
-    return total_cost
-
 def save_tour(routes, path, total_cost):
     with open(path, 'w') as f:
         f.write(f"# Total Cost: {total_cost:.4f}\n")
@@ -367,6 +239,8 @@ def main():
     parser.add_argument('-m', type=int, default=1, help='Number of random exchanges')
     parser.add_argument('--output', type=str, default='perturbed_solution.tour', help='Output .tour file')
     parser.add_argument('--radius', type=float, default=10, help='Distance radius to consider nearby customers')
+    add_distance_arguments(parser)
+    add_seed_argument(parser)
     args = parser.parse_args()
 
     if not args.vrp and not args.tour:
@@ -378,18 +252,17 @@ def main():
         if not args.vrp:
             print("Error: --vrp file required when using --tour to get coordinates")
             return
-        vrp_data = parse_vrp(args.vrp)
-        coords = vrp_data["coords"]
+        vrp_data = parse_vrp(args.vrp, **distance_options(args))
     else:
-        vrp_data = parse_vrp(args.vrp)
-        coords = vrp_data["coords"]
+        vrp_data = parse_vrp(args.vrp, **distance_options(args))
         depot = vrp_data["depot"]
-        route = [depot] + sorted([node for node in coords if node != depot]) + [depot]
+        route = [depot] + sorted(vrp_data.customers.tolist()) + [depot]
         routes = [route]
 
-    perturbed_routes = random_exchange(routes, coords, args.m, radius=args.radius)
-    total_cost = compute_total_cost(vrp_data, perturbed_routes)
-    save_tour(perturbed_routes, args.output, total_cost)
+    perturbed = random_exchange(Solution(vrp_data, routes), args.m, radius=args.radius,
+                                neighbors=vrp_data.shaking_neighbors(args.radius), verbose=True,
+                                rng=make_rng(args.seed))
+    save_tour(perturbed.routes, args.output, perturbed.total_cost)
     print(f"Perturbed solution saved to {args.output}")
 
 if __name__ == "__main__":
@@ -0,0 +1,195 @@
+from functools import cached_property
+
+import numpy as np
+
+from distances import DISTANCE_MODES, DistanceMatrix, coords_to_array, make_distance_oracle
+from parallel import WorkerPool
+from spatial import GridIndex, build_candidate_lists
+from vrp_io import load_vrp
+
+
+# ----------- Shared Problem Object -----------
+class VRPProblem(dict):
+    """Parsed instance plus lazily built distance store and demand array.
+
+    It is still the plain ``vrp_data`` dict every stage already reads; the
+    distances are set up once, on first use, and shared from then on.
+    Built ``from_arrays``, the arrays are the instance and the
+    ``node_coords``/``demands`` dicts are only made if something reads them.
+    ``distance`` picks the store: "full" matrix, "knn" rows or "lazy" LRU.
+    ``candidate_k`` > 0 prunes local search and shaking to each node's
+    K nearest customers. With an instance ``cache`` the neighbour lists,
+    and with ``cache_matrix`` a full distance matrix, are loaded from it
+    (or stored in it on first use).
+    """
+
+    def __init__(self, *args, dtype="float64", distance="full", knn_k=16, cache_size=200_000,
+                 candidate_k=0, cache=None, cache_matrix=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.dtype = dtype
+        self.distance = distance
+        self.knn_k = knn_k
+        self.cache_size = cache_size
+        self.candidate_k = candidate_k
+        self.cache = cache
+        self.cache_matrix = cache_matrix
+        self.node_ids = None
+        self.demand_ids = None
+        self._radius_neighbors = {}
+        self._nearest_customers = {}
+        self._worker_pools = {}
+
+    @classmethod
+    def from_arrays(cls, fields, arrays, **options):
+        """A problem over compiled instance arrays (see vrp_io.compile_instance),
+        used as they are: memory-mapped arrays stay mapped. ``fields`` holds
+        the scalar entries (capacity, depot, ...)."""
+        problem = cls(fields, **options)
+        problem.node_ids, problem.demand_ids = arrays["node_ids"], arrays["demand_ids"]
+        problem.xy, problem.demand_array = arrays["xy"], arrays["demand_array"]
+        return problem
+
+    def __missing__(self, key):
+        if key == "node_coords" and self.node_ids is not None:
+            ids = self.node_ids
+            self[key] = dict(zip(ids.tolist(), map(tuple, self.xy[ids].tolist())))
+        elif key == "demands" and self.demand_ids is not None:
+            ids = self.demand_ids
+            self[key] = dict(zip(ids.tolist(), self.demand_array[ids].tolist()))
+        else:
+            raise KeyError(key)
+        return self[key]
+
+    def __reduce__(self):
+        # Pickles as the instance and its options only; every derived store
+        # (distances, pools, neighbour lists) is rebuilt on the other side.
+        if self.node_ids is None:
+            return _rebuild_problem, (type(self), dict(self), None, self.options())
+        fields = {key: value for key, value in self.items() if key not in ("node_coords", "demands")}
+        arrays = {"node_ids": self.node_ids, "demand_ids": self.demand_ids, "xy": self.xy,
+                  "demand_array": self.demand_array}
+        return _rebuild_problem, (type(self), fields, arrays, self.options())
+
+    @cached_property
+    def nodes(self):
+        """Every node id, depot included, in the order the instance lists them."""
+        if self.node_ids is not None:
+            return np.asarray(self.node_ids)
+        return np.array(list(self["node_coords"]), dtype=np.int64)
+
+    @cached_property
+    def customers(self):
+        return self.nodes[self.nodes != self["depot"]]
+
+    @cached_property
+    def xy(self):
+        return coords_to_array(self["node_coords"])
+
+    @cached_property
+    def dist_matrix(self):
+        if self.cache is not None and self.cache_matrix and self.distance == "full":
+            name = f"dist_{np.dtype(self.dtype).name}"
+            return DistanceMatrix.from_array(
+                self.cache.cached(name, lambda: DistanceMatrix(self.xy, dtype=self.dtype).array))
+        return make_distance_oracle(self.xy, np.sort(self.nodes), mode=self.distance, dtype=self.dtype,
+                                    k=self.knn_k, cache_size=self.cache_size)
+
+    @cached_property
+    def demand_array(self):
+        demands = self["demands"]
+        array = np.zeros(max(self["node_coords"]) + 1, dtype=np.int64)
+        array[list(demands)] = list(demands.values())
+        return array
+
+    @cached_property
+    def demand_list(self):
+        """demand_array as a list, for tight Python loops."""
+        return self.demand_array.tolist()
+
+    @cached_property
+    def grid(self):
+        return GridIndex(self.xy, self.customers)
+
+    @cached_property
+    def candidates(self):
+        if self.candidate_k <= 0:
+            return None
+        return self.nearest_customers(self.candidate_k)
+
+    def nearest_customers(self, k):
+        """The k nearest customers of every node, as lists by node id."""
+        if k not in self._nearest_customers:
+            stored = self.cache.load(f"nearest_{k}") if self.cache is not None else None
+            if stored is not None:
+                self._nearest_customers[k] = stored.tolist()
+            else:
+                lists = build_candidate_lists(self.grid, self["depot"], k)
+                if self.cache is not None and len({len(row) for row in lists}) == 1:
+                    self.cache.store(f"nearest_{k}", np.array(lists, dtype=np.int64))
+                self._nearest_customers[k] = lists
+        return self._nearest_customers[k]
+
+    def options(self):
+        """The keyword arguments this problem was built with."""
+        return {"dtype": self.dtype, "distance": self.distance, "knn_k": self.knn_k,
+                "cache_size": self.cache_size, "candidate_k": self.candidate_k, "cache": self.cache,
+                "cache_matrix": self.cache_matrix}
+
+    def worker_pool(self, workers):
+        """A process pool over this instance, started on first use and
+        shared by every later call with the same worker count."""
+        if workers not in self._worker_pools:
+            self._worker_pools[workers] = WorkerPool(self, workers)
+        return self._worker_pools[workers]
+
+    def shaking_neighbors(self, radius):
+        """Per-node lists of the customers a shake may pair each node with:
+        the candidate lists when set, else everything within ``radius``."""
+        if self.candidates is not None:
+            return self.candidates
+        if radius not in self._radius_neighbors:
+            self._radius_neighbors[radius] = self.grid.radius_neighbors(radius)
+        return self._radius_neighbors[radius]
+
+
+# ----------- Command Line Options -----------
+def add_distance_arguments(parser):
+    parser.add_argument('--distance', choices=DISTANCE_MODES, default='full',
+                        help='Distance store: full matrix, k-nearest rows, or lazy with an LRU cache')
+    parser.add_argument('--knn_k', type=int, default=16, help='Neighbours kept per node in knn mode')
+    parser.add_argument('--cache_size', type=int, default=200_000, help='Pairs kept by the LRU cache in lazy mode')
+    parser.add_argument('--float32', action='store_true', help='Store distances as float32 to halve memory on very large instances')
+    parser.add_argument('--candidates', type=int, default=0,
+                        help='Restrict 2-opt and shaking to the K nearest customers of each node (0 = all)')
+    parser.add_argument('--cache_dir', type=str, default=None,
+                        help='Compile the instance to memory-mapped arrays here for faster reloads (default: $VRP_CACHE_DIR)')
+    parser.add_argument('--cache_matrix', action='store_true',
+                        help='Also keep the full distance matrix in the instance cache')
+
+
+def distance_options(args):
+    return {
+        "dtype": "float32" if args.float32 else "float64",
+        "distance": args.distance,
+        "knn_k": args.knn_k,
+        "cache_size": args.cache_size,
+        "candidate_k": args.candidates,
+        "cache_dir": args.cache_dir,
+        "cache_matrix": args.cache_matrix,
+    }
+
+
+# ----------- VRP Parsing -----------
+def _rebuild_problem(cls, fields, arrays, options):
+    if arrays is None:
+        return cls(fields, **options)
+    return cls.from_arrays(fields, arrays, **options)
+
+
+def parse_vrp(vrp_path, cache_dir=None, **options):
+    """Parses a .vrp file (optionally gzipped) into a VRPProblem over its
+    coordinate and demand arrays. ``cache_dir`` (or VRP_CACHE_DIR) compiles
+    the instance for later runs, which then map it instead of parsing."""
+    data, cache = load_vrp(vrp_path, cache_dir)
+    fields = {"dimension": data["dimension"], "capacity": data["capacity"], "depot": data["depot"]}
+    return VRPProblem.from_arrays(fields, data, cache=cache, **options)
@@ -1,65 +1,10 @@
 import argparse
-import random
-import math
-import copy
 
-# ----------- VRP File Parser -----------
-def parse_vrp(vrp_path):
-    coords = {}
-    demands = {}
-    depot = None
-
-    with open(vrp_path, 'r') as file:
-        lines = file.readlines()
-
-    node_section = False
-    demand_section = False
-    depot_section = False
-
-    for line in lines:
-        line = line.strip()
-        if line.startswith("NODE_COORD_SECTION"):
-            node_section = True
-            demand_section = depot_section = False
-            continue
-        elif line.startswith("DEMAND_SECTION"):
-            demand_section = True
-            node_section = depot_section = False
-            continue
-        elif line.startswith("DEPOT_SECTION"):
-            depot_section = True
-            node_section = demand_section = False
-            continue
-        elif line.startswith("EOF"):
-            break
-
-        if node_section:
-            parts = line.split()
-            if len(parts) >= 3:
-                idx = int(parts[0])
-                x = float(parts[1])
-                y = float(parts[2])
-                coords[idx] = (x, y)
-        elif demand_section:
-            parts = line.split()
-            if len(parts) >= 2:
-                idx = int(parts[0])
-                demand = int(parts[1])
-                demands[idx] = demand
-        elif depot_section:
-            if line == "-1":
-                depot_section = False
-            else:
-                depot = int(line)
-
-    if depot is None:
-        depot = 1
-
-    return {
-        "coords": coords,
-        "demands": demands,
-        "depot": depot
-    }
+from anytime import TimeBudget, add_time_limit_arguments, make_checkpoint
+from problem import add_distance_arguments, distance_options, parse_vrp
+from seeding import add_seed_argument, make_rng
+from shaking import random_exchange
+from solution import Solution
 
 # ----------- TOUR File Parser -----------
 def parse_tour(tour_path):
@@ -76,81 +21,6 @@ def parse_tour(tour_path):
                         routes.append(route_nodes)
     return routes
 
-# ----------- Distance Calculation -----------
-def compute_distance(coords, i, j):
-    xi, yi = coords[i]
-    xj, yj = coords[j]
-    return math.hypot(xi - xj, yi - yj)
-
-# ----------- Local Perturbation (Shaking) -----------
-def find_nearby_pairs(route, coords, radius=10):
-    pairs = []
-    nodes = route[1:-1]
-    for i in range(len(nodes)):
-        for j in range(i+1, len(nodes)):
-            if compute_distance(coords, nodes[i], nodes[j]) <= radius:
-                pairs.append((nodes[i], nodes[j]))
-    return pairs
-
-def random_exchange(routes, coords, m, radius=10):
-    all_routes = routes[:]
-    n = len(all_routes)
-
-    if n < 2:
-        print("Need at least two routes to perform exchanges.")
-        return all_routes
-
-    exchanges_done = 0
-    attempts = 0
-    max_attempts = m * 10
-
-    while exchanges_done < m and attempts < max_attempts:
-        attempts += 1
-        r1_idx, r2_idx = random.sample(range(n), 2)
-        r1 = all_routes[r1_idx]
-        r2 = all_routes[r2_idx]
-
-        pairs_r1 = find_nearby_pairs(r1, coords, radius)
-        pairs_r2 = find_nearby_pairs(r2, coords, radius)
-
-        if not pairs_r1 or not pairs_r2:
-            continue
-
-        pair1 = random.choice(pairs_r1)
-        pair2 = random.choice(pairs_r2)
-
-        def swap_pairs(route, old_pair, new_pair):
-            new_route = route[:]
-            for old_node in old_pair:
-                if old_node in new_route:
-                    new_route.remove(old_node)
-            insert_pos = 1
-            for node in new_pair:
-                new_route.insert(insert_pos, node)
-                insert_pos += 1
-            return new_route
-
-        new_r1 = swap_pairs(r1, pair1, pair2)
-        new_r2 = swap_pairs(r2, pair2, pair1)
-
-        all_routes[r1_idx] = new_r1
-        all_routes[r2_idx] = new_r2
-        exchanges_done += 1
-
-    if attempts >= max_attempts:
-        print("Reached max attempts during perturbation.")
-
-    return all_routes
-
-# ----------- Total Cost Calculation -----------
-def compute_total_cost(vrp_data, routes):
-    coords = vrp_data["coords"]
-    total_cost = 0
-    for route in routes:
-        for i in range(len(route)-1):
-            total_cost += compute_distance(coords, route[i], route[i+1])
-    return total_cost
-
 # ----------- Save Output Tour -----------
 def save_tour(routes, path, total_cost):
     with open(path, 'w') as f:
@@ -160,21 +30,34 @@ def save_tour(routes, path, total_cost):
             f.write(f"Route {idx}: {' '.join(map(str, route_nodes))}\n")
 
 # ----------- REDUCED VNS Main Loop -----------
-def reduced_vns(routes, vrp_data, m, radius, max_iterations=100):
-    best_routes = copy.deepcopy(routes)
-    best_cost = compute_total_cost(vrp_data, best_routes)
-    coords = vrp_data["coords"]
-
-    for i in range(max_iterations):
-        shaken_routes = random_exchange(best_routes, coords, m, radius=radius)
-        shaken_cost = compute_total_cost(vrp_data, shaken_routes)
+def reduced_vns(routes, vrp_data, m, radius, max_iterations=100, rng=None, time_limit=None,
+                checkpoint=None):
+    rng = rng or make_rng()
+    budget = TimeBudget(time_limit) if time_limit else None
+    best = Solution(vrp_data, routes)
+    best_cost = best.total_cost
+    if checkpoint:
+        checkpoint(best.routes, best_cost)
+
+    i = 0
+    while not budget.expired() if budget else i < max_iterations:
+        shaken = random_exchange(best, m, radius=radius,
+                                 neighbors=vrp_data.shaking_neighbors(radius), verbose=True, rng=rng)
+        shaken_cost = shaken.total_cost
 
         if shaken_cost < best_cost:
             best_cost = shaken_cost
-            best_routes = shaken_routes
+            best = shaken
             print(f"Iteration {i}: Improved cost = {best_cost:.2f}")
+            if checkpoint:
+                checkpoint(best.routes, best_cost)
+        i += 1
+        if checkpoint:
+            checkpoint.poll()
 
-    return best_routes, best_cost
+    if checkpoint:
+        checkpoint.flush()
+    return best.routes, best_cost
 
 # ----------- MAIN FUNCTION -----------
 def main():
@@ -184,9 +67,13 @@ def main():
     parser.add_argument('-m', type=int, default=2, help='Number of node-pair exchanges (shaking strength)')
     parser.add_argument('--radius', type=float, default=10, help='Max distance to consider nodes as "nearby" for exchange')
     parser.add_argument('--output', default='vns_solution.tour', type=str, help='Output file path for final tour')
+    parser.add_argument('--max_iter', type=int, default=100, help='Shakes to try')
+    add_distance_arguments(parser)
+    add_seed_argument(parser)
+    add_time_limit_arguments(parser)
     args = parser.parse_args()
 
-    vrp_data = parse_vrp(args.vrp)
+    vrp_data = parse_vrp(args.vrp, **distance_options(args))
     initial_routes = parse_tour(args.tour)
 
     improved_routes, final_cost = reduced_vns(
@@ -194,7 +81,10 @@ def main():
         vrp_data=vrp_data,
         m=args.m,
         radius=args.radius,
-        max_iterations=100
+        max_iterations=args.max_iter,
+        rng=make_rng(args.seed),
+        time_limit=args.time_limit,
+        checkpoint=make_checkpoint(args, save_tour, args.output)
     )
 
     save_tour(improved_routes, args.output, final_cost)
@@ -0,0 +1,24 @@
+import random
+
+import numpy as np
+
+
+# ----------- Random Streams -----------
+def make_rng(seed=None):
+    """The generator a run draws all its random decisions from; without a
+    seed it starts from fresh entropy, as the global module does."""
+    return random.Random(seed)
+
+
+def substreams(rng, n):
+    """n independent generators for parallel workers, split off the next
+    draw of ``rng`` by a NumPy SeedSequence so their streams do not overlap."""
+    children = np.random.SeedSequence(rng.getrandbits(128)).spawn(n)
+    return [random.Random(int.from_bytes(child.generate_state(4).tobytes(), "little"))
+            for child in children]
+
+
+# ----------- Command Line Options -----------
+def add_seed_argument(parser):
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Seed for every random decision of the run, for reproducible results')
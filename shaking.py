@@ -0,0 +1,73 @@
+import random
+
+
+# ----------- Perturbation (Shaking) -----------
+def find_nearby_pairs(route, dist, radius=10, neighbors=None):
+    """Pairs of customers of ``route`` within ``radius``, in route order.
+
+    ``neighbors`` (per-node lists, e.g. from the instance's grid index or
+    candidate lists) limits the scan to those pairs instead of every pair
+    in the route, so a query costs about the size of its output.
+    """
+    nodes = route[1:-1]
+    if neighbors is None:
+        pairs = []
+        for i in range(len(nodes)):
+            for j in range(i+1, len(nodes)):
+                if dist.distance(nodes[i], nodes[j]) <= radius:
+                    pairs.append((nodes[i], nodes[j]))
+        return pairs
+
+    position = {node: i for i, node in enumerate(nodes)}
+    found = set()
+    for i, node in enumerate(nodes):
+        for other in neighbors[node]:
+            j = position.get(other)
+            if j is not None and dist.distance(node, other) <= radius:
+                found.add((i, j) if i < j else (j, i))
+    return [(nodes[i], nodes[j]) for i, j in sorted(found)]
+
+
+def random_exchange(solution, m, radius=10, neighbors=None, verbose=False, rng=None):
+    """Performs m random exchanges of pairs of nearby customers between two
+    different routes. Returns a new Solution; only the routes an exchange
+    touched are recosted. Draws from ``rng`` (default: the global module)."""
+    rng = rng or random
+    shaken = solution.copy()
+    dist = shaken.dist
+    n = len(shaken.routes)
+    if n < 2:
+        if verbose:
+            print("Need at least two routes to perform exchanges.")
+        return shaken
+
+    exchanges_done = 0
+    attempts = 0
+    max_attempts = m * 10
+
+    while exchanges_done < m and attempts < max_attempts:
+        attempts += 1
+        r1_idx, r2_idx = rng.sample(range(n), 2)
+        r1, r2 = shaken.routes[r1_idx], shaken.routes[r2_idx]
+
+        pairs_r1 = find_nearby_pairs(r1, dist, radius, neighbors)
+        pairs_r2 = find_nearby_pairs(r2, dist, radius, neighbors)
+
+        if not pairs_r1 or not pairs_r2:
+            continue
+
+        p1 = rng.choice(pairs_r1)
+        p2 = rng.choice(pairs_r2)
+
+        def swap(route, old, new):
+            route = [x for x in route if x not in old]
+            return [route[0]] + list(new) + route[1:]
+
+        shaken.set_route(r1_idx, swap(r1, p1, p2))
+        shaken.set_route(r2_idx, swap(r2, p2, p1))
+        exchanges_done += 1
+
+    if verbose and attempts >= max_attempts:
+        print("Reached maximum attempts during perturbation.")
+
+    return shaken
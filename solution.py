@@ -0,0 +1,97 @@
+def route_edges(route):
+    return {(a, b) if a < b else (b, a) for a, b in zip(route, route[1:])}
+
+
+def changed_endpoints(old_route, new_route):
+    """Nodes with an incident edge in one route but not the other."""
+    edges = route_edges(old_route) ^ route_edges(new_route)
+    return {node for edge in edges for node in edge}
+
+
+# ----------- Solution With Cached Route Costs -----------
+class Solution:
+    """Routes plus the cost and load of each route, kept in sync.
+
+    Replacing a route through ``set_route`` only recosts that route, so a
+    neighbour produced by a shake costs only its modified routes to score.
+
+    Route lists are never modified in place, only replaced, so copies share
+    every route they have not replaced themselves (copy-on-write).
+    ``locally_optimal`` flags routes local search has already converged on;
+    replacing a route clears its flag and adds the nodes whose incident
+    edges changed to ``touched`` (None until the route was first optimized).
+    ``inter_touched`` does the same across all routes for the inter-route
+    search (None until that search first ran on the solution).
+    """
+
+    def __init__(self, vrp_data, routes):
+        self.dist = vrp_data.dist_matrix
+        self.demands = vrp_data.demand_list
+        self.routes = list(routes)
+        self.costs = [self.dist.route_cost(route) for route in self.routes]
+        self.loads = [self.route_load(route) for route in self.routes]
+        self.locally_optimal = [False] * len(self.routes)
+        self.touched = [None] * len(self.routes)
+        self.inter_touched = None
+
+    def route_load(self, route):
+        demands = self.demands
+        return sum(demands[node] for node in route[1:-1])
+
+    @property
+    def total_cost(self):
+        return sum(self.costs)
+
+    def set_route(self, idx, route):
+        if self.touched[idx] is not None or self.inter_touched is not None:
+            endpoints = changed_endpoints(self.routes[idx], route)
+            if self.touched[idx] is not None:
+                self.touched[idx] = self.touched[idx] | endpoints
+            if self.inter_touched is not None:
+                self.inter_touched = self.inter_touched | endpoints
+        self.routes[idx] = route
+        self.costs[idx] = self.dist.route_cost(route)
+        self.loads[idx] = self.route_load(route)
+        self.locally_optimal[idx] = False
+
+    def mark_optimal(self, idx):
+        self.locally_optimal[idx] = True
+        self.touched[idx] = set()
+
+    def drop_empty_routes(self):
+        keep = [idx for idx, route in enumerate(self.routes) if len(route) > 2]
+        if len(keep) == len(self.routes):
+            return
+        for name in ("routes", "costs", "loads", "locally_optimal", "touched"):
+            values = getattr(self, name)
+            setattr(self, name, [values[idx] for idx in keep])
+
+    def state(self):
+        """Everything but the distance store, e.g. to hand to another process."""
+        return (self.routes, self.costs, self.loads, self.locally_optimal, self.touched,
+                self.inter_touched)
+
+    @classmethod
+    def from_state(cls, vrp_data, state):
+        solution = object.__new__(cls)
+        solution.dist = vrp_data.dist_matrix
+        solution.demands = vrp_data.demand_list
+        routes, costs, loads, locally_optimal, touched, solution.inter_touched = state
+        solution.routes = list(routes)
+        solution.costs = list(costs)
+        solution.loads = list(loads)
+        solution.locally_optimal = list(locally_optimal)
+        solution.touched = list(touched)
+        return solution
+
+    def copy(self):
+        clone = object.__new__(Solution)
+        clone.dist = self.dist
+        clone.demands = self.demands
+        clone.routes = self.routes[:]
+        clone.costs = self.costs[:]
+        clone.loads = self.loads[:]
+        clone.locally_optimal = self.locally_optimal[:]
+        clone.touched = self.touched[:]
+        clone.inter_touched = self.inter_touched
+        return clone
@@ -0,0 +1,235 @@
+import math
+
+import numpy as np
+
+# Average number of points per grid cell.
+POINTS_PER_CELL = 2
+
+# Points per k-d tree leaf.
+LEAF_SIZE = 16
+
+# Relative slack on the box-distance bound when pruning k-d tree subtrees,
+# so distances stored in float32 never prune a true nearest node.
+PRUNE_SLACK = 1e-6
+
+
+# ----------- Uniform Grid Index -----------
+class GridIndex:
+    """Buckets nodes into square cells so nearby-node queries only scan the
+    cells around a point instead of the whole instance."""
+
+    def __init__(self, xy, nodes, cell_size=None):
+        self.xy = xy
+        self.nodes = nodes = np.asarray(nodes)
+        pts = xy[nodes]
+        self.origin = pts.min(axis=0)
+        if cell_size is None:
+            span = pts.max(axis=0) - self.origin
+            area = max(span[0], 1.0) * max(span[1], 1.0)
+            cell_size = math.sqrt(area * POINTS_PER_CELL / len(nodes))
+        self.cell_size = cell_size
+
+        keys = np.floor((pts - self.origin) / cell_size).astype(np.int64)
+        self.shape = tuple(keys.max(axis=0) + 1)
+        order = np.lexsort((keys[:, 1], keys[:, 0]))
+        keys, nodes = keys[order], nodes[order]
+        starts = np.flatnonzero(np.r_[True, np.any(keys[1:] != keys[:-1], axis=1)])
+        self.cells = {
+            (int(keys[s, 0]), int(keys[s, 1])): members
+            for s, members in zip(starts, np.split(nodes, starts[1:]))
+        }
+
+    def ring(self, cx, cy, r):
+        """Yields the members of the cells at Chebyshev distance exactly r."""
+        if r == 0:
+            if (cx, cy) in self.cells:
+                yield self.cells[cx, cy]
+            return
+        for x in range(cx - r, cx + r + 1):
+            for y in (cy - r, cy + r):
+                if (x, y) in self.cells:
+                    yield self.cells[x, y]
+        for y in range(cy - r + 1, cy + r):
+            for x in (cx - r, cx + r):
+                if (x, y) in self.cells:
+                    yield self.cells[x, y]
+
+    def max_ring(self, cx, cy):
+        return max(cx, self.shape[0] - 1 - cx, cy, self.shape[1] - 1 - cy, 0)
+
+    def nearest_neighbors(self, k):
+        """Returns (neighbors, distances) of the k nearest indexed nodes of
+        every indexed node, rows by node id, sorted by increasing distance."""
+        size = len(self.xy)
+        k = min(k, len(self.nodes) - 1)
+        neighbors = np.zeros((size, max(k, 0)), dtype=np.int64)
+        neighbor_dist = np.zeros((size, max(k, 0)), dtype=np.float64)
+        if k <= 0:
+            return neighbors, neighbor_dist
+
+        for (cx, cy), members in self.cells.items():
+            pts = self.xy[members]
+            gathered = []
+            limit = self.max_ring(cx, cy)
+            r = 0
+            while True:
+                gathered.extend(self.ring(cx, cy, r))
+                found = np.concatenate(gathered)
+                # Cells up to ring r hold every point within r cells of any
+                # member, so the search can stop once the k-th is that close.
+                if len(found) > k or r >= limit:
+                    d = np.hypot(pts[:, None, 0] - self.xy[found][None, :, 0],
+                                 pts[:, None, 1] - self.xy[found][None, :, 1])
+                    d[members[:, None] == found[None, :]] = np.inf
+                    kth = np.partition(d, k - 1, axis=1)[:, k - 1]
+                    if kth.max() <= r * self.cell_size or r >= limit:
+                        break
+                r += 1
+
+            part = np.argpartition(d, k - 1, axis=1)[:, :k]
+            part_dist = np.take_along_axis(d, part, axis=1)
+            order = np.argsort(part_dist, axis=1, kind="stable")
+            neighbors[members] = found[np.take_along_axis(part, order, axis=1)]
+            neighbor_dist[members] = np.take_along_axis(part_dist, order, axis=1)
+        return neighbors, neighbor_dist
+
+    def radius_neighbors(self, radius):
+        """Lists, by node id, of the indexed nodes within ``radius`` of each
+        indexed node."""
+        result = [[] for _ in range(len(self.xy))]
+        reach = int(math.ceil(radius / self.cell_size))
+        for (cx, cy), members in self.cells.items():
+            pts = self.xy[members]
+            found = np.concatenate([cell for r in range(min(reach, self.max_ring(cx, cy)) + 1)
+                                    for cell in self.ring(cx, cy, r)])
+            d = np.hypot(pts[:, None, 0] - self.xy[found][None, :, 0],
+                         pts[:, None, 1] - self.xy[found][None, :, 1])
+            close = (d <= radius) & (members[:, None] != found[None, :])
+            for node, row in zip(members.tolist(), close):
+                result[node] = found[row].tolist()
+        return result
+
+
+# ----------- Capacity-Aware k-d Tree -----------
+class DemandKDTree:
+    """k-d tree over customers that answers "nearest node whose demand
+    fits" queries and deletes nodes as they are visited.
+
+    Every subtree keeps the smallest demand still in it, so a query skips
+    whole subtrees where nothing fits and an exhausted route is detected at
+    the root.
+    """
+
+    def __init__(self, xy, nodes, demands, leaf_size=LEAF_SIZE):
+        nodes = np.asarray(nodes, dtype=np.int64)
+        demands = np.asarray(demands, dtype=np.float64)
+        pts = xy[nodes]
+        order = np.arange(len(nodes))
+        self.box = []        # (min x, min y, max x, max y) per tree node
+        self.children = []   # (left, right), or None for a leaf
+        self.split = []      # (axis, value) for inner nodes
+        self.span = []       # [start, stop) of a leaf's points
+        self.parent = []
+
+        stack = [(0, len(nodes), -1, 0)]
+        while stack:
+            start, stop, parent, side = stack.pop()
+            t = len(self.box)
+            seg = pts[order[start:stop]]
+            low, high = seg.min(axis=0), seg.max(axis=0)
+            self.box.append((float(low[0]), float(low[1]), float(high[0]), float(high[1])))
+            self.span.append((start, stop))
+            self.parent.append(parent)
+            self.children.append(None)
+            self.split.append(None)
+            if parent >= 0:
+                left, right = self.children[parent]
+                self.children[parent] = (t, right) if side == 0 else (left, t)
+            if stop - start > leaf_size:
+                axis = int(np.argmax(high - low))
+                mid = (start + stop) // 2
+                part = np.argpartition(seg[:, axis], mid - start)
+                order[start:stop] = order[start:stop][part]
+                self.split[t] = (axis, float(pts[order[mid], axis]))
+                self.children[t] = (-1, -1)
+                stack.append((mid, stop, t, 1))
+                stack.append((start, mid, t, 0))
+
+        self.nodes = nodes[order]
+        self.demand = demands[order]
+        self.alive = np.ones(len(nodes), dtype=bool)
+        self.position = {node: pos for pos, node in enumerate(self.nodes.tolist())}
+        self.leaf_of = np.zeros(len(nodes), dtype=np.int64)
+        self.min_demand = [0.0] * len(self.box)
+        for t in reversed(range(len(self.box))):
+            start, stop = self.span[t]
+            if self.children[t] is None:
+                self.leaf_of[start:stop] = t
+                self.min_demand[t] = float(self.demand[start:stop].min()) if stop > start else math.inf
+            else:
+                left, right = self.children[t]
+                self.min_demand[t] = min(self.min_demand[left], self.min_demand[right])
+
+    def remove(self, node):
+        pos = self.position[node]
+        self.alive[pos] = False
+        t = int(self.leaf_of[pos])
+        start, stop = self.span[t]
+        alive = self.alive[start:stop]
+        value = float(self.demand[start:stop][alive].min()) if alive.any() else math.inf
+        while t >= 0 and self.min_demand[t] != value:
+            self.min_demand[t] = value
+            t = self.parent[t]
+            if t >= 0:
+                left, right = self.children[t]
+                value = min(self.min_demand[left], self.min_demand[right])
+
+    def nearest(self, point, limit, distances, rank):
+        """The remaining node with demand <= ``limit`` nearest to ``point``,
+        or None. ``distances(nodes)`` gives the distances compared, so they
+        match the solver's own; ties go to the lowest ``rank[node]``."""
+        x, y = float(point[0]), float(point[1])
+        best, best_dist, best_rank = None, math.inf, math.inf
+        stack = [0]
+        while stack:
+            t = stack.pop()
+            if self.min_demand[t] > limit:
+                continue
+            x0, y0, x1, y1 = self.box[t]
+            bound = math.hypot(max(x0 - x, 0.0, x - x1), max(y0 - y, 0.0, y - y1))
+            if bound * (1 - PRUNE_SLACK) > best_dist:
+                continue
+            if self.children[t] is not None:
+                # The child on the query's side of the split is searched first.
+                axis, value = self.split[t]
+                left, right = self.children[t]
+                if (x if axis == 0 else y) <= value:
+                    stack += (right, left)
+                else:
+                    stack += (left, right)
+                continue
+            start, stop = self.span[t]
+            fits = self.alive[start:stop] & (self.demand[start:stop] <= limit)
+            found = self.nodes[start:stop][fits]
+            if not len(found):
+                continue
+            d = np.asarray(distances(found))
+            r = rank[found]
+            i = np.lexsort((r, d))[0]
+            if (d[i], r[i]) < (best_dist, best_rank):
+                best, best_dist, best_rank = int(found[i]), d[i], r[i]
+        return best
+
+
+# ----------- Candidate Lists -----------
+def build_candidate_lists(grid, depot, k):
+    """The k nearest indexed customers of every node (depot included), as
+    lists of node ids indexed by node id."""
+    neighbors, _ = grid.nearest_neighbors(k)
+    candidates = neighbors.tolist()
+
+    xy, customers = grid.xy, grid.nodes
+    d = np.hypot(*(xy[customers] - xy[depot]).T)
+    nearest = np.argsort(d, kind="stable")[:k]
+    candidates[depot] = customers[nearest].tolist()
+    return candidates
@@ -0,0 +1,202 @@
+import gzip
+import hashlib
+import json
+import os
+from itertools import chain
+
+import numpy as np
+
+# Section lines parsed per NumPy conversion; bounds the text held in memory
+# at once regardless of the file size.
+CHUNK_LINES = 65536
+
+# Section name -> number of leading numeric columns read from each line.
+SECTION_COLUMNS = {"NODE_COORD_SECTION": 3, "DEMAND_SECTION": 2}
+
+# Default instance cache directory when none is given on the command line.
+CACHE_ENV = "VRP_CACHE_DIR"
+INSTANCE_ARRAYS = ("node_ids", "demand_ids", "xy", "demand_array")
+INSTANCE_FIELDS = ("dimension", "capacity", "depot")
+
+
+# ----------- Streaming Instance Reader -----------
+def open_text(path):
+    """Opens a text instance for reading, gzip-compressed or not (detected
+    from the file's magic bytes, not its name)."""
+    with open(path, 'rb') as f:
+        magic = f.read(2)
+    if magic == b"\x1f\x8b":
+        return gzip.open(path, 'rt')
+    return open(path, 'r')
+
+
+def _parse_rows(lines, columns):
+    # Fast path: every line has exactly `columns` fields, so the whole chunk
+    # converts in one call. Otherwise each line keeps its first `columns`
+    # fields and shorter lines are skipped.
+    rows = list(map(str.split, lines))
+    if all(len(row) == columns for row in rows):
+        return np.array(list(chain.from_iterable(rows)), dtype=np.float64).reshape(-1, columns)
+    rows = [row[:columns] for row in rows if len(row) >= columns]
+    return np.array(rows, dtype=np.float64).reshape(-1, columns)
+
+
+def read_vrp(path):
+    """Reads a TSPLIB/CVRPLIB file in one pass, sections straight into
+    arrays.
+
+    Returns a dict with ``dimension``, ``capacity``, ``depot`` (the last
+    one listed, 1 if none) and the arrays ``node_ids``, ``coords`` (n x 2),
+    ``demand_ids`` and ``demands``.
+    """
+    header = {"dimension": 0, "capacity": 0}
+    blocks = {name: [] for name in SECTION_COLUMNS}
+    depots = []
+    section = None
+    pending = []
+
+    def flush():
+        if pending:
+            blocks[section].append(_parse_rows(pending, SECTION_COLUMNS[section]))
+            pending.clear()
+
+    with open_text(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line[0].isalpha():
+                # A keyword: header field, new section or EOF.
+                if section in SECTION_COLUMNS:
+                    flush()
+                keyword = line.split(":")[0].strip()
+                section = None
+                if keyword == "EOF":
+                    break
+                if keyword in ("DIMENSION", "CAPACITY"):
+                    header[keyword.lower()] = int(line.split(":")[1].strip())
+                elif keyword.endswith("_SECTION"):
+                    section = keyword
+                continue
+
+            if section in SECTION_COLUMNS:
+                pending.append(line)
+                if len(pending) >= CHUNK_LINES:
+                    flush()
+            elif section == "DEPOT_SECTION":
+                if line == "-1":
+                    section = None
+                else:
+                    depots.append(int(line))
+        if section in SECTION_COLUMNS:
+            flush()
+
+    nodes = np.concatenate(blocks["NODE_COORD_SECTION"] or [np.empty((0, 3))])
+    demands = np.concatenate(blocks["DEMAND_SECTION"] or [np.empty((0, 2))])
+    return {
+        "dimension": header["dimension"],
+        "capacity": header["capacity"],
+        "depot": depots[-1] if depots else 1,
+        "node_ids": nodes[:, 0].astype(np.int64),
+        "coords": nodes[:, 1:3],
+        "demand_ids": demands[:, 0].astype(np.int64),
+        "demands": demands[:, 1].astype(np.int64),
+    }
+
+
+def compile_instance(data):
+    """read_vrp's output with the coordinates and demands scattered into
+    arrays indexed by node id (``xy``, ``demand_array``), the form solvers
+    read and the instance cache stores. ``node_ids`` and ``demand_ids``
+    keep the order the file listed them in."""
+    node_ids, demand_ids = data["node_ids"], data["demand_ids"]
+    size = max(node_ids.max(initial=0), demand_ids.max(initial=0)) + 1
+    xy = np.zeros((size, 2), dtype=np.float64)
+    xy[node_ids] = data["coords"]
+    demand_array = np.zeros(size, dtype=np.int64)
+    demand_array[demand_ids] = data["demands"]
+    compiled = {field: data[field] for field in INSTANCE_FIELDS}
+    compiled.update(node_ids=node_ids, demand_ids=demand_ids, xy=xy, demand_array=demand_array)
+    return compiled
+
+
+# ----------- Compiled Instance Cache -----------
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class InstanceCache:
+    """Compiled copy of one instance file, one directory per content hash
+    of the file, so an edited file never reads stale data.
+
+    Arrays are stored as .npy files and loaded memory-mapped, so a repeat
+    run starts without parsing or recomputing anything it finds here.
+    """
+
+    def __init__(self, cache_dir, source_path):
+        self.dir = os.path.join(cache_dir, file_digest(source_path)[:32])
+
+    def _path(self, name):
+        return os.path.join(self.dir, name)
+
+    def load(self, name):
+        path = self._path(f"{name}.npy")
+        return np.load(path, mmap_mode='r') if os.path.exists(path) else None
+
+    def store(self, name, array):
+        # Written under a temporary name first so concurrent runs never see
+        # a partial file.
+        os.makedirs(self.dir, exist_ok=True)
+        tmp_path = self._path(f"{name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            np.save(f, array)
+        os.replace(tmp_path, self._path(f"{name}.npy"))
+
+    def cached(self, name, build):
+        """The stored array ``name``, or build() stored for next time."""
+        array = self.load(name)
+        if array is None:
+            array = build()
+            self.store(name, array)
+        return array
+
+    def load_instance(self):
+        meta_path = self._path("instance.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, 'r') as f:
+            data = json.load(f)
+        for name in INSTANCE_ARRAYS:
+            data[name] = self.load(name)
+            if data[name] is None:
+                return None
+        return data
+
+    def store_instance(self, data):
+        for name in INSTANCE_ARRAYS:
+            self.store(name, data[name])
+        # The metadata goes last: its presence marks a complete entry.
+        tmp_path = self._path(f"instance.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({field: int(data[field]) for field in INSTANCE_FIELDS}, f)
+        os.replace(tmp_path, self._path("instance.json"))
+
+
+def load_vrp(path, cache_dir=None):
+    """The compiled instance (see compile_instance), through the instance
+    cache in ``cache_dir`` (default: the VRP_CACHE_DIR environment variable;
+    no cache if neither is set). A cached instance comes back memory-mapped.
+    Returns (data, cache or None)."""
+    cache_dir = cache_dir or os.environ.get(CACHE_ENV)
+    if not cache_dir:
+        return compile_instance(read_vrp(path)), None
+    cache = InstanceCache(cache_dir, path)
+    data = cache.load_instance()
+    if data is None:
+        data = compile_instance(read_vrp(path))
+        cache.store_instance(data)
+    return data, cache